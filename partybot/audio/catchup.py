@@ -0,0 +1,262 @@
+from typing import List, Optional
+
+import numpy as np
+
+_EMPTY = np.zeros(0, dtype=np.float32)
+
+
+def _join(pieces: List[np.ndarray]) -> np.ndarray:
+    pieces = [piece for piece in pieces if len(piece)]
+    if not pieces:
+        return _EMPTY
+    if len(pieces) == 1:
+        return pieces[0]
+    return np.concatenate(pieces)
+
+
+class _PauseTrimmer:
+    """Streaming form of :func:`trim_silences`.
+
+    Silent runs are followed across calls, so a pause split over two chunks
+    is trimmed like any other.  The trailing partial window and any pause
+    still in progress are held back until the next call or :meth:`flush`.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        threshold_db: float = -50.0,
+        min_silence_ms: int = 120,
+        keep_ms: int = 60,
+    ):
+        self._window = sample_rate // 100
+        self._threshold = 10 ** (threshold_db / 20)
+        self._min_windows = max(1, min_silence_ms // 10)
+        self._keep = (keep_ms * sample_rate // 1000) // 2
+        self._partial = _EMPTY
+        self._held = _EMPTY
+        self._run = 0
+        self.dropped = 0
+
+    @property
+    def held(self) -> int:
+        """Samples held back until a pause ends or a window fills."""
+        return len(self._partial) + len(self._held)
+
+    def process(self, pcm: np.ndarray) -> np.ndarray:
+        """Returns the trimmed audio that is ready to play."""
+        data = _join([self._partial, np.asarray(pcm, dtype=np.float32)])
+        windows = len(data) // self._window
+        # Held state is copied; ``pcm`` may be a borrowed buffer.
+        self._partial = data[windows * self._window:].copy()
+        frames = data[: windows * self._window].reshape(windows, -1)
+        silent = np.sqrt(np.mean(np.square(frames), axis=1)) < self._threshold
+
+        pieces = []
+        start = 0
+        for i in range(windows):
+            if silent[i] and not self._run:
+                pieces.append(data[start * self._window: i * self._window])
+                start = i
+            elif not silent[i] and self._run:
+                self._hold(data[start * self._window: i * self._window])
+                pieces.append(self._end_run())
+                start = i
+            self._run = self._run + 1 if silent[i] else 0
+        rest = data[start * self._window: windows * self._window]
+        if self._run:
+            self._hold(rest)
+        else:
+            pieces.append(rest)
+        return _join(pieces)
+
+    def flush(self) -> np.ndarray:
+        """Returns everything held back and forgets any pause in progress."""
+        out = _join([self._end_run(), self._partial])
+        self._partial = _EMPTY
+        return out
+
+    def _hold(self, silence: np.ndarray):
+        held = _join([self._held, silence])
+        if self._run >= self._min_windows and len(held) > 2 * self._keep:
+            # Only the first and last ``keep`` samples of a long pause are
+            # played, so the middle can be dropped before the pause ends.
+            self.dropped += len(held) - 2 * self._keep
+            held = np.concatenate(
+                (held[:self._keep], held[len(held) - self._keep:])
+            )
+        self._held = held.copy() if held.base is not None else held
+
+    def _end_run(self) -> np.ndarray:
+        held = self._held
+        self._held = _EMPTY
+        self._run = 0
+        return held
+
+
+class _TimeCompressor:
+    """Streaming WSOLA; see :func:`time_compress`.
+
+    The read position, the half frame still waiting for its overlap and
+    the input not yet consumed carry over between calls, so chunk
+    boundaries are invisible and the output is ``1 / rate`` of the input
+    over any span.  A periodic Hann window at half-frame hops sums to one,
+    so overlapped samples need no normalisation.  With ``rate <= 1`` the
+    pending half frame is completed from its natural continuation and
+    everything held is passed through unchanged.
+    """
+
+    def __init__(
+        self, sample_rate: int, frame_ms: int = 20, search_ms: int = 5
+    ):
+        self._n = sample_rate * frame_ms // 1000
+        self._hop = self._n // 2
+        self._tolerance = sample_rate * search_ms // 1000
+        window = np.hanning(self._n + 1)[:-1].astype(np.float32)
+        self._fade_in = window[:self._hop]
+        self._fade_out = window[self._hop:]
+        self._src = _EMPTY
+        # Start of the last placed frame in ``_src``; None while idle.
+        self._pos: Optional[int] = None
+        self._nominal = 0.0
+        self._tail = _EMPTY
+
+    @property
+    def held(self) -> int:
+        """Input samples buffered but not yet played."""
+        if self._pos is None:
+            return len(self._src)
+        return len(self._src) - self._pos - self._hop
+
+    def process(self, pcm: np.ndarray, rate: float) -> np.ndarray:
+        """Returns the audio ready to play after compressing by ``rate``."""
+        src = _join([self._src, np.asarray(pcm, dtype=np.float32)])
+        if rate <= 1.0:
+            self._src = _EMPTY
+            if self._pos is None:
+                return src
+            out = src[self._pos + self._hop:]
+            self._pos = None
+            return out
+
+        n, hop, tolerance = self._n, self._hop, self._tolerance
+        pieces = []
+        if self._pos is None:
+            if len(src) < n:
+                self._src = src.copy()
+                return _EMPTY
+            # The first half frame stands in for a natural continuation.
+            pieces.append(src[:hop])
+            self._pos = 0
+            self._nominal = 0.0
+            self._tail = src[hop:n] * self._fade_out
+
+        analysis_hop = hop * rate
+        while True:
+            nominal = self._nominal + analysis_hop
+            centre = int(round(nominal))
+            lo = max(0, centre - tolerance)
+            hi = centre + tolerance
+            if max(hi, self._pos + hop) + n > len(src):
+                break
+            # The audio that would naturally follow the previous frame.
+            template = src[self._pos + hop: self._pos + hop + n]
+            scores = np.correlate(src[lo: hi + n], template, mode="valid")
+            pos = lo + int(np.argmax(scores))
+            pieces.append(self._tail + src[pos: pos + hop] * self._fade_in)
+            self._tail = src[pos + hop: pos + n] * self._fade_out
+            self._pos = pos
+            self._nominal = nominal
+
+        # Keep only what the next frame's search and template can reach.
+        drop = max(0, min(self._pos + hop, int(self._nominal) - tolerance))
+        self._src = src[drop:].copy()
+        self._pos -= drop
+        self._nominal -= drop
+        return _join(pieces)
+
+
+def trim_silences(
+    pcm: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = -50.0,
+    min_silence_ms: int = 120,
+    keep_ms: int = 60,
+) -> np.ndarray:
+    """Shortens every silent run longer than ``min_silence_ms``.
+
+    Silence is measured on 10 ms windows; each qualifying run is cut down
+    to ``keep_ms`` split evenly around the cut so speech edges are kept.
+    """
+    trimmer = _PauseTrimmer(
+        sample_rate, threshold_db, min_silence_ms, keep_ms
+    )
+    out = _join([trimmer.process(pcm), trimmer.flush()])
+    return out if trimmer.dropped else pcm
+
+
+def time_compress(
+    pcm: np.ndarray,
+    rate: float,
+    sample_rate: int,
+    frame_ms: int = 20,
+    search_ms: int = 5,
+) -> np.ndarray:
+    """Speeds audio up by ``rate`` without changing pitch (WSOLA).
+
+    Hann-windowed frames are overlap-added at half-frame hops in the output
+    while the read position advances ``rate`` times faster; each frame is
+    shifted within ``search_ms`` to best line up with the audio it replaces.
+    The last frame or so, which no later frame overlaps, is left as is.
+    """
+    if rate <= 1.0 or len(pcm) < 2 * (sample_rate * frame_ms // 1000):
+        return pcm
+    compressor = _TimeCompressor(sample_rate, frame_ms, search_ms)
+    return _join([compressor.process(pcm, rate), compressor.process([], 1.0)])
+
+
+class CatchUpController:
+    """Pulls playback latency back to a target without dropping audio.
+
+    Long pauses are stripped first; if the buffer is still above target,
+    audio is played slightly faster, never more than ``max_rate``.  Both
+    stages stream across chunks and may hold back a few tens of
+    milliseconds; :meth:`flush` releases it when nothing else is queued.
+    """
+
+    def __init__(
+        self,
+        target_ms: int = 400,
+        max_rate: float = 1.15,
+        sample_rate: int = 24000,
+    ):
+        self._target_ms = target_ms
+        self._max_rate = max_rate
+        self._sample_rate = sample_rate
+        self._trimmer = _PauseTrimmer(sample_rate)
+        self._compressor = _TimeCompressor(sample_rate)
+
+    def process(self, pcm: np.ndarray, buffered_ms: float) -> np.ndarray:
+        """Returns the audio ready to play, shortened to reduce backlog."""
+        excess_ms = buffered_ms - self._target_ms
+        if excess_ms <= 0:
+            if not self._trimmer.held and not self._compressor.held:
+                return pcm
+            # Finish any pause or compression in flight, then pass through.
+            trimmed = _join([self._trimmer.flush(), pcm])
+            return self._compressor.process(trimmed, 1.0)
+
+        dropped = self._trimmer.dropped
+        trimmed = self._trimmer.process(pcm)
+        excess_ms -= (
+            (self._trimmer.dropped - dropped) * 1000 / self._sample_rate
+        )
+        rate = 1.0
+        if excess_ms > 0:
+            duration_ms = len(pcm) * 1000 / self._sample_rate
+            rate = min(self._max_rate, 1 + excess_ms / max(duration_ms, 1.0))
+        return self._compressor.process(trimmed, rate)
+
+    def flush(self) -> np.ndarray:
+        """Returns all audio held back between chunks."""
+        return self._compressor.process(self._trimmer.flush(), 1.0)
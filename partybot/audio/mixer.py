@@ -1,10 +1,16 @@
 import numpy as np
 from collections import deque
-from typing import Dict
+from typing import Dict, Optional
+
+from partybot.utils.bufpool import POOL
 
 
 class Mixer:
-    """A real-time audio mixer that keeps per-user ring buffers."""
+    """A real-time audio mixer that keeps per-user ring buffers.
+
+    Buffered chunks are borrowed from the shared buffer pool and returned
+    to it as soon as they have been mixed or dropped.
+    """
 
     def __init__(
         self,
@@ -20,7 +26,7 @@ class Mixer:
         self._buffers: Dict[int, deque[np.ndarray]] = {}
 
     def _to_mono(self, pcm_data: np.ndarray) -> np.ndarray:
-        """Converts incoming audio to mono float32."""
+        """Converts incoming audio to a pooled mono float32 array."""
         pcm = np.asarray(pcm_data, dtype=np.float32)
         if pcm.ndim == 1:
             if self._input_channels > 1:
@@ -35,7 +41,11 @@ class Mixer:
             raise ValueError(
                 "PCM data must have the same number of channels as the mixer"
             )
-        return pcm.mean(axis=1)
+        mono = POOL.acquire(len(pcm))
+        np.sum(pcm, axis=1, out=mono)
+        if pcm.shape[1] > 1:
+            mono *= 1.0 / pcm.shape[1]
+        return mono
 
     def add(self, user_id: int, pcm_data: np.ndarray):
         """Adds PCM data from a user to the mixer."""
@@ -48,41 +58,80 @@ class Mixer:
         while total > self._frame_capacity and self._buffers[user_id]:
             removed = self._buffers[user_id].popleft()
             total -= len(removed)
+            POOL.release(removed)
+
+    @property
+    def sample_rate(self) -> int:
+        """The sample rate of the mixed output."""
+        return self._sample_rate
+
+    @property
+    def headroom(self) -> float:
+        """The linear gain applied to the mix before clipping."""
+        return self._headroom
+
+    def mix_into(self, out: np.ndarray, max_speakers: Optional[int] = None):
+        """Sums the next ``len(out)`` frames of every user into ``out``.
+
+        No headroom or clipping is applied, so callers batching several
+        mixers can apply both once over a stacked array.  With
+        ``max_speakers`` only the loudest users are mixed; the others have
+        the same span discarded so they stay in sync.
+        """
+        num_frames = len(out)
+        buffers = [dq for dq in self._buffers.values() if dq]
+        if max_speakers is not None and len(buffers) > max_speakers:
+            buffers.sort(key=lambda dq: float(np.dot(dq[0], dq[0])))
+            for dq in buffers[:-max_speakers]:
+                self._discard(dq, num_frames)
+            buffers = buffers[-max_speakers:]
+        for dq in buffers:
+            pos = 0
+            while pos < num_frames and dq:
+                chunk = dq[0]
+                take = min(len(chunk), num_frames - pos)
+                out[pos:pos + take] += chunk[:take]
+                if take == len(chunk):
+                    POOL.release(dq.popleft())
+                else:
+                    dq[0] = chunk[take:]
+                pos += take
+
+    @staticmethod
+    def _discard(dq: deque, num_frames: int):
+        while num_frames > 0 and dq:
+            chunk = dq[0]
+            if len(chunk) <= num_frames:
+                POOL.release(dq.popleft())
+            else:
+                dq[0] = chunk[num_frames:]
+            num_frames -= len(chunk)
 
     def pop(self, duration_ms: int) -> np.ndarray:
-        """Pops a chunk of mixed mono audio from the buffers."""
+        """Pops a chunk of mixed mono audio from the buffers.
+
+        The result is borrowed from the buffer pool; callers may release it
+        once done.
+        """
         num_frames = int(self._sample_rate * (duration_ms / 1000.0))
         if num_frames <= 0:
             return np.zeros(0, dtype=np.float32)
 
-        mixed = np.zeros(num_frames, dtype=np.float32)
-        for dq in self._buffers.values():
-            frames_needed = num_frames
-            parts = []
-            while frames_needed > 0 and dq:
-                chunk = dq[0]
-                if len(chunk) <= frames_needed:
-                    parts.append(chunk)
-                    dq.popleft()
-                    frames_needed -= len(chunk)
-                else:
-                    parts.append(chunk[:frames_needed])
-                    dq[0] = chunk[frames_needed:]
-                    frames_needed = 0
-
-            if parts:
-                user_mix = np.concatenate(parts)
-                if len(user_mix) < num_frames:
-                    user_mix = np.pad(
-                        user_mix,
-                        (0, num_frames - len(user_mix)),
-                    )
-                mixed += user_mix
-
+        mixed = POOL.zeros(num_frames)
+        self.mix_into(mixed)
         mixed *= self._headroom
         np.clip(mixed, -1.0, 1.0, out=mixed)
         return mixed
 
+    def buffered_bytes(self) -> int:
+        """Returns the memory held by all user buffers."""
+        return sum(
+            chunk.nbytes for dq in self._buffers.values() for chunk in dq
+        )
+
     def clear(self):
         """Clears all mixer buffers."""
+        for dq in self._buffers.values():
+            for chunk in dq:
+                POOL.release(chunk)
         self._buffers.clear()
@@ -1,13 +1,151 @@
+from typing import Dict, Hashable, List, Optional
 
 import numpy as np
 import soxr
 
 
-def downsample_48k_to_16k(pcm_48k: np.ndarray) -> np.ndarray:
-    """Downsamples a 48kHz PCM signal to 16kHz."""
-    return soxr.resample(pcm_48k, 48000, 16000, quality=soxr.FAST)
+def downsample_48k_to_16k(
+    pcm_48k: np.ndarray, quality: str = soxr.LQ
+) -> np.ndarray:
+    """Downsamples a 48kHz PCM signal to 16kHz.
 
+    2-D input is treated as ``(frames, channels)`` and every channel is
+    resampled in a single call.
+    """
+    return soxr.resample(pcm_48k, 48000, 16000, quality=quality)
 
-def upsample_24k_to_48k(pcm_24k: np.ndarray) -> np.ndarray:
+
+def upsample_24k_to_48k(
+    pcm_24k: np.ndarray, quality: str = soxr.LQ
+) -> np.ndarray:
     """Upsamples a 24kHz PCM signal to 48kHz."""
-    return soxr.resample(pcm_24k, 24000, 48000, quality=soxr.FAST)
+    return soxr.resample(pcm_24k, 24000, 48000, quality=quality)
+
+
+class MultiSpeakerResampler:
+    """Resamples many speakers in one soxr call by packing them as channels.
+
+    Each speaker keeps a fixed channel slot in a persistent
+    ``soxr.ResampleStream``, so filter state carries across chunks.  Slots of
+    speakers absent from a call are fed silence to stay time-aligned.  A
+    released slot is reused only once ``_DRAIN_MS`` of that silence has
+    flushed the departed speaker out of its filter state.
+
+    The stream is rebuilt, resetting every speaker's filter state, when the
+    number of slots grows or :attr:`quality` changes.  By default it grows
+    just enough for the speakers in that call, since every spare slot costs
+    a full channel of filtering; callers that add speakers while others are
+    mid-stream can pass a larger ``growth`` to rebuild less often.
+    """
+
+    # Longer than the filter memory of every soxr quality preset.
+    _DRAIN_MS = 100
+
+    def __init__(
+        self,
+        in_rate: int = 48000,
+        out_rate: int = 16000,
+        quality: str = soxr.LQ,
+        initial_channels: int = 1,
+        growth: int = 1,
+    ):
+        self._in_rate = in_rate
+        self._out_rate = out_rate
+        self._quality = quality
+        self._capacity = initial_channels
+        self._growth = growth
+        self._slots: Dict[Hashable, int] = {}
+        self._free: List[int] = list(range(initial_channels))
+        # Released slots -> input samples of silence fed since release.
+        self._draining: Dict[int, int] = {}
+        self._drain_samples = in_rate * self._DRAIN_MS // 1000
+        self._stream: Optional[soxr.ResampleStream] = None
+        # Speakers are written as contiguous rows, then transposed once into
+        # the interleaved layout soxr expects; column writes are much slower.
+        self._rows = np.zeros((initial_channels, 0), dtype=np.float32)
+        self._packed = np.zeros((0, initial_channels), dtype=np.float32)
+
+    @property
+    def quality(self) -> str:
+        """The soxr quality; changing it restarts the stream."""
+        return self._quality
+
+    @quality.setter
+    def quality(self, quality: str):
+        if quality != self._quality:
+            self._quality = quality
+            self._stream = None
+            self._draining.clear()
+
+    def resample(
+        self, frames: Dict[Hashable, np.ndarray]
+    ) -> Dict[Hashable, np.ndarray]:
+        """Resamples equal-length mono chunks keyed by speaker.
+
+        The returned arrays are views into one shared output block.
+        """
+        if not frames:
+            return {}
+        lengths = {len(pcm) for pcm in frames.values()}
+        if len(lengths) != 1:
+            raise ValueError("All speaker chunks must have the same length")
+
+        joining = [sid for sid in frames if sid not in self._slots]
+        if joining:
+            self._assign(joining)
+        if self._stream is None:
+            self._stream = soxr.ResampleStream(
+                self._in_rate,
+                self._out_rate,
+                self._capacity,
+                dtype="float32",
+                quality=self._quality,
+            )
+
+        length = lengths.pop()
+        if self._rows.shape != (self._capacity, length):
+            self._rows = np.zeros((self._capacity, length), dtype=np.float32)
+            self._packed = np.zeros(
+                (length, self._capacity), dtype=np.float32
+            )
+        rows = self._rows
+        silent = np.ones(self._capacity, dtype=bool)
+        for speaker_id, pcm in frames.items():
+            slot = self._slots[speaker_id]
+            rows[slot] = pcm
+            silent[slot] = False
+        if silent.any():
+            rows[silent] = 0.0
+        packed = self._packed
+        np.copyto(packed, rows.T)
+        out = self._stream.resample_chunk(packed)
+        for slot in list(self._draining):
+            self._draining[slot] += length
+            if self._draining[slot] >= self._drain_samples:
+                del self._draining[slot]
+        return {
+            speaker_id: out[:, self._slots[speaker_id]]
+            for speaker_id in frames
+        }
+
+    def release(self, speaker_id: Hashable):
+        """Frees the slot of a speaker who left."""
+        slot = self._slots.pop(speaker_id, None)
+        if slot is not None:
+            self._free.append(slot)
+            self._draining[slot] = 0
+
+    def _assign(self, joining: List[Hashable]):
+        ready = sorted(s for s in self._free if s not in self._draining)
+        shortfall = len(joining) - len(ready)
+        if shortfall > 0:
+            added = max(shortfall, self._growth)
+            self._free.extend(range(self._capacity, self._capacity + added))
+            self._capacity += added
+            # A new stream starts from zeroed state in every slot.
+            self._stream = None
+            self._draining.clear()
+            ready = sorted(self._free)
+        for speaker_id, slot in zip(joining, ready):
+            self._free.remove(slot)
+            self._slots[speaker_id] = slot
@@ -0,0 +1,283 @@
+import asyncio
+import contextlib
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+import soxr
+
+from partybot.audio.mixer import Mixer
+from partybot.audio.resample import MultiSpeakerResampler
+from partybot.utils.backpressure import BackpressureQueue
+from partybot.utils.bufpool import POOL
+from partybot.utils.metrics import REGISTRY
+
+DSP_TICK_SECONDS = REGISTRY.histogram(
+    "partybot_dsp_tick_seconds",
+    "Time spent on capture DSP per scheduler tick.",
+)
+
+
+def energy_db(block: np.ndarray) -> np.ndarray:
+    """Returns the RMS level in dBFS of every row of a 2-D block."""
+    # einsum sums the squares without a block-sized temporary.
+    rms = np.sqrt(np.einsum("ij,ij->i", block, block) / block.shape[1])
+    with np.errstate(divide="ignore"):
+        return 20 * np.log10(rms)
+
+
+class ScheduledSession:
+    """A session's registration with the :class:`DSPScheduler`."""
+
+    def __init__(self, mixer: Mixer, maxsize: int = 50):
+        self.mixer = mixer
+        self.suspended = False
+        self.queue: BackpressureQueue[Tuple[np.ndarray, float]] = (
+            BackpressureQueue(maxsize=maxsize, name="dsp")
+        )
+        # Streaming soxr output does not arrive in whole frames, so the
+        # resampled audio is carried here until a full frame is ready.
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._carried = 0
+
+    def carry(self, pcm: np.ndarray, frame: int) -> int:
+        """Buffers resampled audio; returns how many whole frames it holds."""
+        needed = self._carried + len(pcm)
+        if needed > len(self._carry):
+            grown = np.zeros(max(needed, 4 * frame), dtype=np.float32)
+            grown[:self._carried] = self._carry[:self._carried]
+            self._carry = grown
+        self._carry[self._carried:needed] = pcm
+        self._carried = needed
+        return needed // frame
+
+    def take_frames(self, out: np.ndarray):
+        """Moves the oldest whole frames into the rows of ``out``."""
+        taken = out.size
+        out.reshape(-1)[:] = self._carry[:taken]
+        self._carried -= taken
+        self._carry[:self._carried] = self._carry[taken:taken + self._carried]
+
+    def reset_carry(self):
+        """Drops partially resampled audio, e.g. while suspended."""
+        self._carried = 0
+
+    async def frames(self) -> AsyncIterator[Tuple[np.ndarray, float]]:
+        """Yields ``(pcm, level_db)`` for every frame produced.
+
+        ``pcm`` is a 16 kHz frame, or the unresampled mixer-rate frame of a
+        tick while the session is suspended.  It is borrowed from the buffer
+        pool and may be released once consumed.
+        """
+        while True:
+            yield await self.queue.get()
+
+    def buffered_bytes(self) -> int:
+        """Returns the memory held by processed frames not yet consumed."""
+        return self.queue.buffered_bytes()
+
+
+class DSPScheduler:
+    """Process-wide ticker that runs the capture DSP for every session.
+
+    On each tick the next frame is mixed out of every registered mixer into
+    one stacked array per input rate and headroom and clipping are applied
+    once.  All 48 kHz rows are downsampled together by one persistent
+    multi-channel soxr stream with a slot per session, so filter state
+    carries across ticks.  Streaming output does not arrive in whole
+    frames, so each session's output is re-cut into 16 kHz frames and a
+    tick may yield no frame or two; energy is computed in one pass over
+    the frames actually produced.  Mixers already running at 16 kHz skip
+    the resample.  Each session receives its frames through its own queue.
+
+    Sessions always receive ``frame_ms`` frames.  ``tick_ms`` may be raised
+    to a multiple of it at runtime to shed load: each wakeup then mixes and
+    resamples several frames in one pass, cutting the per-tick overhead.
+    ``quality`` and ``max_speakers`` may be lowered at runtime too.
+    Suspended sessions are mixed and metered but not resampled.
+    """
+
+    OUTPUT_RATE = 16000
+
+    def __init__(self, tick_ms: int = 20, sample_rate: int = 48000):
+        self._frame_ms = tick_ms
+        self._tick_ms = tick_ms
+        self._sample_rate = sample_rate
+        self._sessions: List[ScheduledSession] = []
+        self._task: Optional[asyncio.Task] = None
+        self._last_tick_ms = 0.0
+        # Spare slots mean a guild joining rebuilds the stream, resetting
+        # every other session's filter state, only every few joins.
+        self._resampler = MultiSpeakerResampler(
+            sample_rate, self.OUTPUT_RATE, quality=soxr.LQ, growth=4
+        )
+        self.max_speakers: Optional[int] = None
+
+    @property
+    def quality(self) -> str:
+        """The soxr quality; changing it restarts the resampling stream."""
+        return self._resampler.quality
+
+    @quality.setter
+    def quality(self, quality: str):
+        self._resampler.quality = quality
+
+    @property
+    def frame_ms(self) -> int:
+        """The duration of every frame handed to sessions."""
+        return self._frame_ms
+
+    @property
+    def tick_ms(self) -> int:
+        """The duration of audio processed per tick."""
+        return self._tick_ms
+
+    @tick_ms.setter
+    def tick_ms(self, tick_ms: int):
+        if tick_ms <= 0 or tick_ms % self._frame_ms:
+            raise ValueError(
+                f"Tick must be a multiple of the {self._frame_ms} ms frame"
+            )
+        self._tick_ms = tick_ms
+
+    @property
+    def last_tick_ms(self) -> float:
+        """DSP wall time per frame of audio during the most recent tick.
+
+        Reads zero while the ticker is stopped.
+        """
+        return self._last_tick_ms
+
+    def register(self, mixer: Mixer) -> ScheduledSession:
+        """Adds a mixer to the schedule, starting the ticker if needed."""
+        if mixer.sample_rate not in (self._sample_rate, self.OUTPUT_RATE):
+            raise ValueError(
+                f"Mixer sample rate must be {self._sample_rate} or "
+                f"{self.OUTPUT_RATE} Hz"
+            )
+        handle = ScheduledSession(mixer)
+        self._sessions.append(handle)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return handle
+
+    def unregister(self, handle: ScheduledSession):
+        """Removes a session; the ticker stops once none remain."""
+        with contextlib.suppress(ValueError):
+            self._sessions.remove(handle)
+        self._resampler.release(handle)
+
+    def close(self):
+        """Stops the ticker and drops every registration."""
+        for handle in self._sessions:
+            self._resampler.release(handle)
+        self._sessions.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def tick(self):
+        """Processes one tick of audio for every registered session."""
+        handles = list(self._sessions)
+        if not handles:
+            return
+
+        groups: Dict[int, List[int]] = {}
+        for i, handle in enumerate(handles):
+            groups.setdefault(handle.mixer.sample_rate, []).append(i)
+
+        frames_per_tick = self._tick_ms // self._frame_ms
+        frame16 = int(self.OUTPUT_RATE * (self._frame_ms / 1000.0))
+        emitted: List[Tuple[ScheduledSession, np.ndarray, float]] = []
+        ready: List[Tuple[ScheduledSession, int]] = []
+        for rate, indices in groups.items():
+            group = [handles[i] for i in indices]
+            block = self._mix(group, rate)
+            # Every row is metered frame by frame in one pass.
+            frames = block.reshape(len(group) * frames_per_tick, -1)
+            levels = energy_db(frames)
+            resample = {}
+            for i, (handle, row) in enumerate(zip(group, block)):
+                if rate == self.OUTPUT_RATE or handle.suspended:
+                    handle.reset_carry()
+                    first = i * frames_per_tick
+                    for k in range(first, first + frames_per_tick):
+                        emitted.append(
+                            (handle, self._lend(frames[k]), float(levels[k]))
+                        )
+                else:
+                    resample[handle] = row
+            if resample:
+                resampled = self._resampler.resample(resample)
+                for handle, pcm in resampled.items():
+                    count = handle.carry(pcm, frame16)
+                    if count:
+                        ready.append((handle, count))
+            POOL.release(block)
+
+        if ready:
+            block16 = POOL.acquire(
+                (sum(count for _, count in ready), frame16)
+            )
+            pos = 0
+            for handle, count in ready:
+                handle.take_frames(block16[pos:pos + count])
+                pos += count
+            levels16 = energy_db(block16)
+            pos = 0
+            for handle, count in ready:
+                for k in range(pos, pos + count):
+                    emitted.append(
+                        (handle, self._lend(block16[k]), float(levels16[k]))
+                    )
+                pos += count
+            POOL.release(block16)
+
+        for handle, row, level in emitted:
+            await handle.queue.put((row, level))
+
+    @staticmethod
+    def _lend(row: np.ndarray) -> np.ndarray:
+        """Copies a row of a shared block into its own pooled buffer."""
+        lent = POOL.acquire(len(row))
+        np.copyto(lent, row)
+        return lent
+
+    def _mix(self, handles: List[ScheduledSession], rate: int) -> np.ndarray:
+        """Mixes one tick of every handle into a clipped 2-D block."""
+        frames = int(rate * (self._tick_ms / 1000.0))
+        block = POOL.zeros((len(handles), frames))
+        gains = np.empty((len(handles), 1), dtype=np.float32)
+        for i, handle in enumerate(handles):
+            handle.mixer.mix_into(block[i], self.max_speakers)
+            gains[i] = handle.mixer.headroom
+        block *= gains
+        np.clip(block, -1.0, 1.0, out=block)
+        return block
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        try:
+            while self._sessions:
+                tick_ms = self._tick_ms
+                started = time.perf_counter()
+                await self.tick()
+                elapsed = time.perf_counter() - started
+                self._last_tick_ms = (
+                    elapsed * 1000.0 * self._frame_ms / tick_ms
+                )
+                DSP_TICK_SECONDS.observe(elapsed)
+
+                next_tick += tick_ms / 1000.0
+                delay = next_tick - loop.time()
+                if delay < 0:
+                    # Fell behind; resynchronise instead of bursting to
+                    # catch up.
+                    next_tick = loop.time()
+                    delay = 0
+                await asyncio.sleep(delay)
+        finally:
+            # No DSP runs while stopped; a stale reading would keep the
+            # load shedder degraded after every session has left.
+            self._last_tick_ms = 0.0
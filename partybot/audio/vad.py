@@ -17,8 +17,12 @@ class VAD:
     def is_speech(
         self, frame: bytes, threshold: float = -float("inf")
     ) -> bool:
-        """Return True if the frame is speech above the given threshold."""
-        if len(frame) != self._frame_size:
+        """Return True if the frame is speech above the given threshold.
+
+        ``frame`` may be any bytes-like object, such as a ``memoryview`` of
+        pooled int16 samples.
+        """
+        if memoryview(frame).nbytes != self._frame_size:
             raise ValueError(f"Frame must be {self._frame_size} bytes")
 
         if threshold > -float("inf"):
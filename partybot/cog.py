@@ -1,35 +1,117 @@
 import asyncio
+import contextlib
+import time
+from collections import deque
 from typing import Optional
 
 import discord
+import numpy as np
+import soxr
 from redbot.core import commands, Config
 
+from partybot.audio.catchup import CatchUpController
 from partybot.audio.mixer import Mixer
 from partybot.audio.resample import downsample_48k_to_16k, upsample_24k_to_48k
+from partybot.audio.scheduler import DSPScheduler, ScheduledSession
 from partybot.audio.vad import VAD
-from partybot.stream.gemini_session import GeminiSession
+from partybot.stream.gemini_session import GeminiSession, to_linear16
 from partybot.voice.discord_bridge import DiscordBridge
+from partybot.utils.adaptive_chunk import AdaptiveChunkController
+from partybot.utils.bufpool import POOL
+from partybot.utils.loadshed import LoadShedder, LoopLagMonitor
+from partybot.utils.memtrace import MemoryTracer
+from partybot.utils.metrics import REGISTRY, MetricsServer
 from partybot.logging import get_logger
 
 
+def _release_all(buffers: list):
+    """Returns every pooled buffer in ``buffers`` and empties the list."""
+    for buf in buffers:
+        POOL.release(buf)
+    buffers.clear()
+
+
 class PartyBot(commands.Cog):
     """Real-time voice chat with Gemini."""
 
+    _SHED_MIN_CHUNK_MS = 100
+    _SHED_TICK_MS = 60
+    _SHED_MAX_SPEAKERS = 3
+    _GEMINI_OUTPUT_RATE = 24000
+
     def __init__(self, bot):
         self.bot = bot
         self.config = Config.get_conf(self, identifier=1234567890)
         default_guild = {
             "model_id": "gemini-2.5-flash-preview-native-audio-dialog",
             "input_buffer_ms": 100,
+            "adaptive_buffer": True,
+            "input_buffer_min_ms": 20,
+            "input_buffer_max_ms": 200,
             "silence_level_db": -45,
             "mix_headroom_db": 6,
             "voice_name": "aura-asteria-en",
             "cost_guard_usd": 2.0,
+            "idle_suspend_s": 600,
+            "preroll_ms": 500,
+            "direct_opus_16k": False,
+            "playback_target_ms": 400,
         }
         self.config.register_guild(**default_guild)
+        self.config.register_global(metrics_host="127.0.0.1", metrics_port=0)
         self.active_sessions: dict[int, asyncio.Task] = {}
+        self.session_stats: dict[int, dict] = {}
+        self.session_components: dict[int, dict] = {}
+        self.scheduler = DSPScheduler()
+        self.memory_tracer = MemoryTracer()
+        self.load_shedder = LoadShedder()
+        self._load_task: Optional[asyncio.Task] = None
+        self._metrics_server: Optional[MetricsServer] = None
+        self._metric_sessions = REGISTRY.gauge(
+            "partybot_sessions", "Active voice sessions."
+        )
+        self._metric_queue_depth = REGISTRY.gauge(
+            "partybot_queue_depth",
+            "Items waiting in a queue.",
+            ["guild", "queue"],
+        )
+        self._metric_buffer_bytes = REGISTRY.gauge(
+            "partybot_buffer_bytes",
+            "Live audio buffer memory.",
+            ["guild", "component"],
+        )
+        self._metric_cost = REGISTRY.gauge(
+            "partybot_session_cost_usd",
+            "Estimated Gemini session cost.",
+            ["guild"],
+        )
+        self._metric_chunk_ms = REGISTRY.gauge(
+            "partybot_capture_chunk_ms",
+            "Current capture chunk size.",
+            ["guild"],
+        )
+        self._metric_load_level = REGISTRY.gauge(
+            "partybot_load_level", "Current load-shedding level."
+        )
         self.logger = get_logger(__name__)
 
+    async def cog_load(self):
+        self._load_task = asyncio.create_task(self._load_monitor())
+        REGISTRY.add_collector(self._collect_metrics)
+        try:
+            await self._restart_metrics_server()
+        except OSError as e:
+            self.logger.error(f"Could not start the metrics endpoint: {e}")
+
+    async def cog_unload(self):
+        if self._load_task is not None:
+            self._load_task.cancel()
+        REGISTRY.remove_collector(self._collect_metrics)
+        if self._metrics_server is not None:
+            await self._metrics_server.stop()
+        self.scheduler.close()
+        self.memory_tracer.stop()
+
     @commands.group()
     async def partybot(self, ctx: commands.Context):
         """Manage the PartyBot."""
@@ -59,6 +141,109 @@ class PartyBot(commands.Cog):
         await self.config.guild(ctx.guild).cost_guard_usd.set(dollars)
         await ctx.send(f"Cost guard set to ${dollars:.2f}.")
 
+    @partybot.command(name="setidle")
+    async def set_idle(self, ctx: commands.Context, seconds: int):
+        """Set how long the channel must be silent before suspending.
+
+        Use 0 to never suspend.
+        """
+        await self.config.guild(ctx.guild).idle_suspend_s.set(max(0, seconds))
+        if seconds > 0:
+            await ctx.send(f"Sessions suspend after {seconds}s of silence.")
+        else:
+            await ctx.send("Idle suspend disabled.")
+
+    @partybot.command(name="setdirectdecode")
+    async def set_direct_decode(self, ctx: commands.Context, enabled: bool):
+        """Decode received Opus straight to 16 kHz mono (next join)."""
+        await self.config.guild(ctx.guild).direct_opus_16k.set(enabled)
+        state = "enabled" if enabled else "disabled"
+        await ctx.send(f"Direct 16 kHz Opus decoding {state}.")
+
+    @partybot.command(name="setplaybacktarget")
+    async def set_playback_target(self, ctx: commands.Context, ms: int):
+        """Set the playback latency that catch-up aims for in ms."""
+        await self.config.guild(ctx.guild).playback_target_ms.set(max(0, ms))
+        await ctx.send(f"Playback latency target set to {max(0, ms)} ms.")
+
+    @partybot.command(name="setbuffer")
+    async def set_buffer(
+        self, ctx: commands.Context, min_ms: int, max_ms: int
+    ):
+        """Set the bounds for adaptive capture chunk sizing in ms."""
+        if min_ms <= 0 or max_ms < min_ms:
+            await ctx.send("Bounds must satisfy 0 < min <= max.")
+            return
+        await self.config.guild(ctx.guild).input_buffer_min_ms.set(min_ms)
+        await self.config.guild(ctx.guild).input_buffer_max_ms.set(max_ms)
+        await ctx.send(f"Capture chunk bounds set to {min_ms}-{max_ms} ms.")
+
+    @partybot.command()
+    async def stats(self, ctx: commands.Context):
+        """Show live statistics for this guild's voice session."""
+        stats = self.session_stats.get(ctx.guild.id)
+        if not stats:
+            await ctx.send("No active voice session.")
+            return
+        lines = [f"{key}: {value}" for key, value in sorted(stats.items())]
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    @partybot.command()
+    async def memory(self, ctx: commands.Context):
+        """Show the live audio buffer sizes of this guild's voice session."""
+        report = self._buffer_report(ctx.guild.id)
+        if not report:
+            await ctx.send("No active voice session.")
+            return
+        lines = [f"{name}: {size} B" for name, size in report.items()]
+        lines.append(f"total: {sum(report.values())} B")
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    @partybot.command()
+    @commands.is_owner()
+    async def memtrace(
+        self, ctx: commands.Context, action: str = "top", limit: int = 10
+    ):
+        """Trace PartyBot allocations: `start`, `stop` or `top [limit]`."""
+        action = action.lower()
+        if action == "start":
+            self.memory_tracer.start()
+            await ctx.send("Allocation tracing started.")
+        elif action == "stop":
+            self.memory_tracer.stop()
+            await ctx.send("Allocation tracing stopped.")
+        elif action == "top":
+            if not self.memory_tracer.active:
+                await ctx.send("Tracing is not active; use `memtrace start`.")
+                return
+            elapsed, rows = self.memory_tracer.top(limit)
+            lines = [f"Top allocators, change over last {elapsed:.0f}s:"]
+            lines.extend(
+                f"{size / 1024:9.1f} KiB {diff / 1024:+9.1f} KiB  {location}"
+                for location, size, diff in rows
+            )
+            await ctx.send("```\n" + "\n".join(lines) + "\n```")
+        else:
+            await ctx.send("Action must be `start`, `stop` or `top`.")
+
+    @partybot.command()
+    @commands.is_owner()
+    async def metrics(
+        self, ctx: commands.Context, port: int, host: str = "127.0.0.1"
+    ):
+        """Serve Prometheus metrics on `host:port/metrics`; port 0 disables."""
+        await self.config.metrics_port.set(port)
+        await self.config.metrics_host.set(host)
+        try:
+            await self._restart_metrics_server()
+        except OSError as e:
+            await ctx.send(f"Could not start the metrics endpoint: {e}")
+            return
+        if port:
+            await ctx.send(f"Serving metrics on http://{host}:{port}/metrics.")
+        else:
+            await ctx.send("Metrics endpoint disabled.")
+
     @partybot.command()
     async def join(self, ctx: commands.Context):
         """Joins the voice channel you are in."""
@@ -77,6 +262,10 @@ class PartyBot(commands.Cog):
             await ctx.send("I am already running in this guild.")
             return
 
+        if self.load_shedder.level >= LoadShedder.NO_NEW_JOINS:
+            await ctx.send("I am overloaded right now; try again later.")
+            return
+
         self.active_sessions[ctx.guild.id] = asyncio.create_task(
             self._voice_session(ctx)
         )
@@ -99,14 +288,17 @@ class PartyBot(commands.Cog):
     async def _voice_session(self, ctx: commands.Context):
         """The main voice session loop."""
         vc: Optional[discord.VoiceClient] = None
+        bridge: Optional[DiscordBridge] = None
         gemini_session: Optional[GeminiSession] = None
         try:
             vc = await ctx.author.voice.channel.connect(
                 cls=discord.VoiceClient
             )
-            bridge = DiscordBridge(vc)
-
             guild_config = await self.config.guild(ctx.guild).all()
+            bridge = DiscordBridge(
+                vc, decode_16k=guild_config["direct_opus_16k"]
+            )
+
             # Get the Gemini API key from shared tokens without awaiting
             api_key = self.bot.get_shared_api_tokens("google").get("api_key")
             gemini_session = GeminiSession(
@@ -118,16 +310,36 @@ class PartyBot(commands.Cog):
             await gemini_session.create()
             gemini_session.start_send_loop()
 
-            mixer = Mixer(headroom_db=guild_config["mix_headroom_db"])
+            mixer = Mixer(
+                sample_rate=bridge.sample_rate,
+                input_channels=bridge.channels,
+                headroom_db=guild_config["mix_headroom_db"],
+            )
             vad = VAD()
+            stats = self.session_stats.setdefault(ctx.guild.id, {})
+            dsp = self.scheduler.register(mixer)
+            self.session_components[ctx.guild.id] = {
+                "bridge": bridge,
+                "gemini": gemini_session,
+                "mixer": mixer,
+                "dsp": dsp,
+            }
 
             capture_task = asyncio.create_task(
                 self._capture_loop(
-                    bridge, gemini_session, mixer, vad, guild_config
+                    bridge,
+                    gemini_session,
+                    mixer,
+                    dsp,
+                    vad,
+                    guild_config,
+                    stats,
                 )
             )
             playback_task = asyncio.create_task(
-                self._playback_loop(bridge, gemini_session)
+                self._playback_loop(
+                    bridge, gemini_session, guild_config, stats
+                )
             )
 
             await asyncio.gather(capture_task, playback_task)
@@ -143,36 +355,301 @@ class PartyBot(commands.Cog):
             self.logger.error(f"Error in voice session: {e}", exc_info=True)
             await ctx.send("An error occurred during the voice session.")
         finally:
+            self.session_stats.pop(ctx.guild.id, None)
+            parts = self.session_components.pop(ctx.guild.id, {})
+            if "dsp" in parts:
+                self.scheduler.unregister(parts["dsp"])
+            if bridge is not None:
+                bridge.close()
             if vc is not None and vc.is_connected():
                 await vc.disconnect()
             if gemini_session is not None:
                 await gemini_session.close()
 
+    async def _restart_metrics_server(self):
+        if self._metrics_server is not None:
+            await self._metrics_server.stop()
+            self._metrics_server = None
+        port = await self.config.metrics_port()
+        if not port:
+            return
+        server = MetricsServer(
+            REGISTRY, host=await self.config.metrics_host(), port=port
+        )
+        await server.start()
+        self._metrics_server = server
+
+    def _collect_metrics(self):
+        """Refreshes per-guild gauges from the live sessions."""
+        for gauge in (
+            self._metric_queue_depth,
+            self._metric_buffer_bytes,
+            self._metric_cost,
+            self._metric_chunk_ms,
+        ):
+            gauge.clear()
+        self._metric_sessions.set(len(self.session_components))
+        self._metric_load_level.set(self.load_shedder.level)
+        for guild_id, parts in self.session_components.items():
+            gemini = parts["gemini"]
+            queues = {
+                "gemini_in": gemini.in_q,
+                "gemini_out": gemini.out_q,
+                "dsp": parts["dsp"].queue,
+            }
+            for name, queue in queues.items():
+                self._metric_queue_depth.set(
+                    queue.qsize(), guild=guild_id, queue=name
+                )
+            for component, size in self._buffer_report(guild_id).items():
+                self._metric_buffer_bytes.set(
+                    size, guild=guild_id, component=component
+                )
+            self._metric_cost.set(gemini.cost_usd, guild=guild_id)
+            chunk_ms = self.session_stats.get(guild_id, {}).get("chunk_ms")
+            if chunk_ms is not None:
+                self._metric_chunk_ms.set(chunk_ms, guild=guild_id)
+
+    async def _load_monitor(self):
+        """Sheds or restores DSP work based on loop lag and DSP time."""
+        monitor = LoopLagMonitor()
+        while True:
+            lag_ms = await monitor.sample()
+            level = self.load_shedder.observe(
+                lag_ms, self.scheduler.last_tick_ms
+            )
+            # Longer ticks mix and resample several frames per wakeup.
+            self.scheduler.tick_ms = (
+                self._SHED_TICK_MS
+                if level >= LoadShedder.LARGER_CHUNKS
+                else self.scheduler.frame_ms
+            )
+            self.scheduler.quality = (
+                soxr.QQ if level >= LoadShedder.CHEAP_RESAMPLE else soxr.LQ
+            )
+            self.scheduler.max_speakers = (
+                self._SHED_MAX_SPEAKERS
+                if level >= LoadShedder.FEWER_SPEAKERS
+                else None
+            )
+            for stats in self.session_stats.values():
+                stats["loop_lag_ms"] = round(lag_ms, 1)
+                stats["load_level"] = self.load_shedder.level_name
+
+    def _buffer_report(self, guild_id: int) -> dict[str, int]:
+        """Returns the live audio buffer bytes of a session by component."""
+        parts = self.session_components.get(guild_id)
+        if not parts:
+            return {}
+        report = dict(parts["bridge"].buffered_bytes())
+        report["mixer"] = parts["mixer"].buffered_bytes()
+        report["dsp_queue"] = parts["dsp"].buffered_bytes()
+        report["gemini_in_q"] = parts["gemini"].in_q.buffered_bytes()
+        report["gemini_out_q"] = parts["gemini"].out_q.buffered_bytes()
+        return report
+
+    async def _feed_mixer(self, bridge: DiscordBridge, mixer: Mixer):
+        """Buffers every frame received from Discord into the mixer."""
+        async for user_id, pcm48 in bridge.recv_frames():
+            mixer.add(user_id, pcm48)
+            POOL.release(pcm48)
+
     async def _capture_loop(
         self,
         bridge: DiscordBridge,
         gemini_session: GeminiSession,
         mixer: Mixer,
+        dsp: ScheduledSession,
         vad: VAD,
         guild_config: dict,
+        stats: dict,
     ):
-        """The loop that captures audio from Discord and sends it to Gemini."""
-        async for user_id, pcm48 in bridge.recv_frames():
-            mixer.add(user_id, pcm48)
+        """The loop that captures audio from Discord and sends it to Gemini.
 
-            chunk = mixer.pop(guild_config["input_buffer_ms"])
-            if chunk.size > 0:
-                chunk16 = downsample_48k_to_16k(chunk)
-                if vad.is_speech(
-                    chunk16.tobytes(),
-                    threshold=guild_config["silence_level_db"],
-                ):
-                    await gemini_session.send_pcm(chunk16.tobytes())
+        Mixing, resampling and energy measurement happen in the shared
+        :class:`DSPScheduler`; this loop only gates each 16 kHz frame with
+        the VAD and batches speech into chunks for Gemini.  After
+        ``idle_suspend_s`` without speech the Gemini session is closed and
+        only frame energy is watched until someone speaks again.
+
+        Frames and pending chunks are borrowed from the buffer pool, and
+        each chunk is handed to Gemini as a ``memoryview`` without copying.
+        """
+        loop = asyncio.get_running_loop()
+        chunker = AdaptiveChunkController(
+            initial_ms=guild_config["input_buffer_ms"],
+            min_ms=guild_config["input_buffer_min_ms"],
+            max_ms=guild_config["input_buffer_max_ms"],
+        )
+        preroll: deque[np.ndarray] = deque(
+            maxlen=max(
+                1, guild_config["preroll_ms"] // self.scheduler.frame_ms
+            )
+        )
+        feed_task = asyncio.create_task(self._feed_mixer(bridge, mixer))
+        pending: list[np.ndarray] = []
+        pending_ms = 0
+        speech = False
+        last_speech = loop.time()
+        stats["suspended"] = False
+        try:
+            async for frame, level_db in dsp.frames():
+                if feed_task.done():
+                    # Propagates any error raised while receiving.
+                    feed_task.result()
+                    break
+
+                if dsp.suspended:
+                    if len(preroll) == preroll.maxlen:
+                        POOL.release(preroll[0])
+                    preroll.append(frame)
+                    if level_db >= guild_config["silence_level_db"]:
+                        await self._resume(gemini_session, dsp, preroll, stats)
+                        last_speech = loop.time()
+                    continue
+
+                pcm16 = to_linear16(frame)
+                POOL.release(frame)
+                if level_db >= guild_config["silence_level_db"]:
+                    speech = speech or vad.is_speech(pcm16.data)
+                pending.append(pcm16)
+                pending_ms += self.scheduler.frame_ms
+
+                min_ms = guild_config["input_buffer_min_ms"]
+                max_ms = guild_config["input_buffer_max_ms"]
+                if self.load_shedder.level >= LoadShedder.LARGER_CHUNKS:
+                    min_ms = max(min_ms, self._SHED_MIN_CHUNK_MS)
+                    max_ms = max(max_ms, min_ms)
+                chunker.set_bounds(min_ms, max_ms)
+                if guild_config["adaptive_buffer"]:
+                    chunk_ms = chunker.update(
+                        gemini_session.in_q.qsize(),
+                        gemini_session.send_latency_ms,
+                    )
+                else:
+                    chunk_ms = max(guild_config["input_buffer_ms"], min_ms)
+                stats["chunk_ms"] = chunk_ms
+                stats["send_latency_ms"] = round(
+                    gemini_session.send_latency_ms, 1
+                )
+                stats["dsp_tick_ms"] = round(self.scheduler.last_tick_ms, 2)
+
+                if pending_ms >= chunk_ms:
+                    if speech:
+                        chunk = POOL.acquire(
+                            sum(len(part) for part in pending), np.int16
+                        )
+                        np.concatenate(pending, out=chunk)
+                        await gemini_session.send_pcm(chunk.data)
+                        last_speech = loop.time()
+                    _release_all(pending)
+                    pending_ms = 0
+                    speech = False
+
+                idle_s = guild_config["idle_suspend_s"]
+                if idle_s and loop.time() - last_speech > idle_s:
+                    _release_all(pending)
+                    pending_ms = 0
+                    await self._suspend(gemini_session, dsp, stats)
+        finally:
+            feed_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await feed_task
+
+    async def _suspend(
+        self,
+        gemini_session: GeminiSession,
+        dsp: ScheduledSession,
+        stats: dict,
+    ):
+        """Closes the Gemini session and stops resampling while idle."""
+        dsp.suspended = True
+        # Frames already queued are 16 kHz; left in place they would join
+        # the pre-roll and be downsampled a second time on resume.
+        for frame, _ in dsp.queue.drain():
+            POOL.release(frame)
+        _release_all(gemini_session.in_q.drain())
+        await gemini_session.close()
+        stats["suspended"] = True
+        self.logger.info("Voice session suspended after inactivity.")
+
+    async def _resume(
+        self,
+        gemini_session: GeminiSession,
+        dsp: ScheduledSession,
+        preroll: deque,
+        stats: dict,
+    ):
+        """Re-opens the Gemini session and replays the buffered pre-roll.
+
+        Frames that arrive while reconnecting are queued by the scheduler
+        and replayed too, so the first words are not lost.
+        """
+        started = time.perf_counter()
+        replay = list(preroll)
+        preroll.clear()
+        await gemini_session.create()
+        gemini_session.start_send_loop()
+        # drain() does not yield, so the scheduler cannot tick before the
+        # flag is cleared: every frame it returns is still unresampled.
+        replay.extend(frame for frame, _ in dsp.queue.drain())
+        dsp.suspended = False
+
+        pcm16 = np.concatenate(replay)
+        _release_all(replay)
+        if dsp.mixer.sample_rate != DSPScheduler.OUTPUT_RATE:
+            pcm16 = downsample_48k_to_16k(pcm16, self.scheduler.quality)
+        await gemini_session.send_pcm(to_linear16(pcm16).data)
+        resume_ms = (time.perf_counter() - started) * 1000.0
+        stats["suspended"] = False
+        stats["resume_ms"] = round(resume_ms, 1)
+        self.logger.info(f"Voice session resumed in {resume_ms:.0f} ms.")
 
     async def _playback_loop(
-        self, bridge: DiscordBridge, gemini_session: GeminiSession
+        self,
+        bridge: DiscordBridge,
+        gemini_session: GeminiSession,
+        guild_config: dict,
+        stats: dict,
     ):
-        """The loop that plays audio from Gemini back to Discord."""
-        async for chunk24 in gemini_session.iter_audio():
-            pcm48 = upsample_24k_to_48k(chunk24)
-            await bridge.play_pcm(pcm48)
+        """The loop that plays audio from Gemini back to Discord.
+
+        When more than ``playback_target_ms`` is already queued, audio is
+        shortened by trimming pauses and mild time compression so latency
+        converges back to the target instead of growing.  Catch-up streams
+        across chunks and is flushed whenever Gemini has nothing queued.  Output ends
+        whenever the Gemini session is suspended, so playback waits for it to
+        reopen and carries on.
+        """
+        catch_up = CatchUpController(
+            target_ms=guild_config["playback_target_ms"],
+            sample_rate=self._GEMINI_OUTPUT_RATE,
+        )
+        # LINEAR16 mono bytes per millisecond of Gemini output.
+        bytes_per_ms = self._GEMINI_OUTPUT_RATE * 2 / 1000
+        while True:
+            async for chunk24 in gemini_session.iter_audio():
+                samples = np.frombuffer(chunk24, dtype=np.int16)
+                received = POOL.acquire(len(samples))
+                np.copyto(received, samples)
+                received *= 1 / 32768.0
+                buffered_ms = (
+                    bridge.buffered_ms
+                    + gemini_session.out_q.buffered_bytes() / bytes_per_ms
+                )
+                stats["playback_buffer_ms"] = round(buffered_ms)
+                pcm24 = catch_up.process(received, buffered_ms)
+                if not gemini_session.out_q.qsize():
+                    # Nothing else is queued, so release what catch-up is
+                    # holding back for the next chunk.
+                    pcm24 = np.concatenate((pcm24, catch_up.flush()))
+                pcm48 = upsample_24k_to_48k(pcm24, self.scheduler.quality)
+                # Catch-up copies what it holds, so only its output may
+                # still be a view of the pooled input.
+                POOL.release(received)
+                if len(pcm48):
+                    await bridge.play_pcm(pcm48)
+            # The closed session's queued audio was dropped; so is the
+            # little catch-up still held.
+            catch_up.flush()
+            await gemini_session.wait_until_open()
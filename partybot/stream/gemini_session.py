@@ -1,7 +1,33 @@
 import asyncio
 import contextlib
+import time
 import google.generativeai as genai
+import numpy as np
+
 from partybot.utils.backpressure import BackpressureQueue
+from partybot.utils.bufpool import POOL
+from partybot.utils.metrics import REGISTRY
+
+BYTES_SENT = REGISTRY.counter(
+    "partybot_gemini_sent_bytes_total", "Audio bytes sent to Gemini."
+)
+BYTES_RECEIVED = REGISTRY.counter(
+    "partybot_gemini_received_bytes_total", "Audio bytes received from Gemini."
+)
+
+
+def to_linear16(pcm: np.ndarray) -> np.ndarray:
+    """Converts float32 mono PCM to the LINEAR16 samples Gemini expects.
+
+    The result is borrowed from the buffer pool.
+    """
+    scaled = POOL.acquire(len(pcm))
+    np.clip(pcm, -1.0, 1.0, out=scaled)
+    scaled *= 32767.0
+    samples = POOL.acquire(len(pcm), np.int16)
+    np.copyto(samples, scaled, casting="unsafe")
+    POOL.release(scaled)
+    return samples
 
 
 class GeminiSession:
@@ -9,6 +35,7 @@ class GeminiSession:
 
     _INPUT_BYTE_COST = 3e-6
     _OUTPUT_BYTE_COST = 12e-6
+    _LATENCY_SMOOTHING = 0.2
 
     def __init__(
         self,
@@ -26,9 +53,17 @@ class GeminiSession:
         self._bytes_in = 0
         self._bytes_out = 0
         self._session = None
-        self.in_q = BackpressureQueue(maxsize=100)  # 10 seconds of audio
-        self.out_q = BackpressureQueue(maxsize=100)
+        # 10 seconds of audio
+        self.in_q = BackpressureQueue(maxsize=100, name="gemini_in")
+        self.out_q = BackpressureQueue(maxsize=100, name="gemini_out")
         self._send_task: asyncio.Task | None = None
+        self._send_latency_ms = 0.0
+        self._opened = asyncio.Event()
+
+    @property
+    def send_latency_ms(self) -> float:
+        """Smoothed time taken by recent sends to the LiveSession."""
+        return self._send_latency_ms
 
     async def create(self):
         """Creates the LiveSession."""
@@ -46,11 +81,23 @@ class GeminiSession:
             response_modalities=["AUDIO"],
             proactivity={"proactive_audio": self._proactive_audio},
         )
+        self._opened.set()
+
+    async def wait_until_open(self):
+        """Waits until the LiveSession has been (re)created."""
+        await self._opened.wait()
 
     async def send_pcm(self, pcm_data: bytes):
-        """Sends PCM data to the LiveSession."""
+        """Sends PCM data to the LiveSession.
+
+        ``pcm_data`` may be a ``memoryview`` of a buffer borrowed from the
+        buffer pool; ownership passes to the session, which releases it once
+        sent.
+        """
         if self._session:
-            self._bytes_in += len(pcm_data)
+            nbytes = memoryview(pcm_data).nbytes
+            self._bytes_in += nbytes
+            BYTES_SENT.inc(nbytes)
             await self.in_q.put(pcm_data)
             await self._check_cost_guard()
 
@@ -63,6 +110,7 @@ class GeminiSession:
             async for chunk in self._session.response_iter():
                 if chunk.audio:
                     self._bytes_out += len(chunk.audio)
+                    BYTES_RECEIVED.inc(len(chunk.audio))
                     await self.out_q.put(chunk.audio)
                     await self._check_cost_guard()
 
@@ -71,6 +119,9 @@ class GeminiSession:
         try:
             while self._session:
                 chunk = await self.out_q.get()
+                if chunk is None:
+                    # Sentinel queued by close()
+                    break
                 yield chunk
         finally:
             recv_task.cancel()
@@ -87,25 +138,42 @@ class GeminiSession:
         if self._session:
             await self._session.close()
             self._session = None
+            self._opened.clear()
+            # Audio still queued belongs to the closed session; the
+            # sentinel must not wait behind it.
+            self.out_q.clear()
+            await self.out_q.put(None)
 
     async def _send_loop(self):
         """The loop that sends audio to the LiveSession."""
         while self._session:
             pcm_data = await self.in_q.get()
             if self._session:
-                await self._session.send(pcm_data)
+                started = time.perf_counter()
+                # The library may keep what it is given, so it gets its own
+                # copy and the pooled buffer can be reused.
+                await self._session.send(bytes(pcm_data))
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                self._send_latency_ms += self._LATENCY_SMOOTHING * (
+                    elapsed_ms - self._send_latency_ms
+                )
+            POOL.release(pcm_data)
 
     def start_send_loop(self):
         """Starts the send loop."""
         self._send_task = asyncio.create_task(self._send_loop())
 
-    async def _check_cost_guard(self):
-        if self._cost_guard is None:
-            return
-        cost = (
+    @property
+    def cost_usd(self) -> float:
+        """Estimated cost of the audio exchanged so far."""
+        return (
             self._bytes_in * self._INPUT_BYTE_COST
             + self._bytes_out * self._OUTPUT_BYTE_COST
         )
-        if cost >= self._cost_guard and self._session:
+
+    async def _check_cost_guard(self):
+        if self._cost_guard is None:
+            return
+        if self.cost_usd >= self._cost_guard and self._session:
             await self.close()
             raise RuntimeError("Gemini session cost guard exceeded")
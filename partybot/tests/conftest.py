@@ -30,9 +30,14 @@ class PCMAudio:
         self.data = data
 
 
+class AudioSource:
+    pass
+
+
 discord_stub.VoiceClient = VoiceClient
 discord_stub.AudioSink = AudioSink
 discord_stub.PCMAudio = PCMAudio
+discord_stub.AudioSource = AudioSource
 sys.modules.setdefault('discord', discord_stub)
 
 for name in [
@@ -68,10 +73,17 @@ if not hasattr(actions, 'Cog'):
 
         return deco
 
+    def is_owner():
+        def deco(f):
+            return f
+
+        return deco
+
     actions.Cog = Cog
     actions.Context = Context
     actions.group = group
     actions.command = command
+    actions.is_owner = is_owner
 
 # Config stub used in cog imports
 core = sys.modules.get('redbot.core')
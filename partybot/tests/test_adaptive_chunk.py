@@ -0,0 +1,32 @@
+import pytest
+from partybot.utils.adaptive_chunk import AdaptiveChunkController
+
+
+def test_chunk_shrinks_when_idle_and_fast():
+    chunker = AdaptiveChunkController(initial_ms=100, min_ms=20, max_ms=200)
+    for _ in range(10):
+        chunk_ms = chunker.update(queue_depth=0, send_latency_ms=10.0)
+    assert chunk_ms == 20
+
+
+def test_chunk_grows_on_backlog_or_latency():
+    chunker = AdaptiveChunkController(initial_ms=100, min_ms=20, max_ms=200)
+    assert chunker.update(queue_depth=5, send_latency_ms=10.0) == 120
+    assert chunker.update(queue_depth=0, send_latency_ms=500.0) == 140
+    for _ in range(10):
+        chunker.update(queue_depth=5, send_latency_ms=500.0)
+    assert chunker.chunk_ms == 200
+
+
+def test_chunk_holds_in_between():
+    chunker = AdaptiveChunkController(initial_ms=100)
+    assert chunker.update(queue_depth=1, send_latency_ms=10.0) == 100
+    assert chunker.update(queue_depth=0, send_latency_ms=100.0) == 100
+
+
+def test_chunk_bounds():
+    chunker = AdaptiveChunkController(initial_ms=100, min_ms=20, max_ms=200)
+    chunker.set_bounds(140, 160)
+    assert chunker.chunk_ms == 140
+    with pytest.raises(ValueError):
+        AdaptiveChunkController(min_ms=100, max_ms=50)
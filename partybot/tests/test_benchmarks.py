@@ -0,0 +1,244 @@
+"""Microbenchmarks for the audio hot path.
+
+Skipped by default; run with ``PARTYBOT_BENCH=1 pytest -q -k benchmark``.
+Each case reports nanoseconds and bytes allocated per 20 ms frame of audio
+and fails when either regresses beyond the stored baseline by more than the
+allowed threshold.  Set ``PARTYBOT_BENCH_UPDATE=1`` to record new baselines
+in ``benchmark_baselines.json`` instead of comparing; a case without a
+stored baseline fails otherwise.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soxr
+
+# Provide a minimal stub for discord.sinks.Sink used in imports
+discord = sys.modules.setdefault('discord', types.ModuleType('discord'))
+if not hasattr(discord, 'sinks'):
+    sinks_mod = types.ModuleType('discord.sinks')
+
+    class Sink:
+        pass
+
+    class Filters:
+        @staticmethod
+        def container(func):
+            return func
+
+    sinks_mod.Sink = Sink
+    sinks_mod.core = types.SimpleNamespace(Filters=Filters(), AudioData=bytes)
+    discord.sinks = sinks_mod
+    sys.modules.setdefault('discord.sinks', sinks_mod)
+
+from partybot.audio.mixer import Mixer  # noqa: E402
+from partybot.audio.resample import (  # noqa: E402
+    MultiSpeakerResampler,
+    downsample_48k_to_16k,
+    upsample_24k_to_48k,
+)
+from partybot.audio.vad import VAD  # noqa: E402
+from partybot.utils.backpressure import BackpressureQueue  # noqa: E402
+from partybot.utils.bufpool import POOL  # noqa: E402
+from partybot.voice.discord_bridge import DiscordBridge  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get('PARTYBOT_BENCH'),
+    reason='set PARTYBOT_BENCH=1 to run benchmarks',
+)
+
+BASELINE_FILE = Path(__file__).with_name('benchmark_baselines.json')
+UPDATE = bool(os.environ.get('PARTYBOT_BENCH_UPDATE'))
+TIME_THRESHOLD = float(os.environ.get('PARTYBOT_BENCH_THRESHOLD', '1.0'))
+ALLOC_THRESHOLD = 0.25
+ALLOC_SLACK_BYTES = 256
+
+SPEAKERS = [1, 5, 20, 50]
+CHUNKS_MS = [20, 100, 200]
+FRAME_MS = 20
+
+
+def _samples(rate, ms, channels=1):
+    rng = np.random.default_rng(0)
+    shape = (int(rate * ms / 1000),)
+    if channels > 1:
+        shape += (channels,)
+    return (rng.standard_normal(shape) * 0.1).astype(np.float32)
+
+
+def _measure(fn, frames, min_time=0.2):
+    """Returns ``(ns_per_frame, bytes_per_frame)`` for ``fn``."""
+    fn()
+    number = 1
+    while True:
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter_ns() - started
+        if elapsed >= min_time * 1e9 / 5:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(4):
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter_ns() - started)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best / number / frames, peak / frames
+
+
+def _check(name, ns_per_frame, bytes_per_frame):
+    baselines = {}
+    if BASELINE_FILE.exists():
+        baselines = json.loads(BASELINE_FILE.read_text())
+    result = {
+        'ns_per_frame': round(ns_per_frame, 1),
+        'bytes_per_frame': round(bytes_per_frame, 1),
+    }
+    if UPDATE:
+        baselines[name] = result
+        BASELINE_FILE.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True) + '\n'
+        )
+        return
+
+    if name not in baselines:
+        pytest.fail(
+            f'{name}: no stored baseline; record one with '
+            'PARTYBOT_BENCH_UPDATE=1'
+        )
+    base = baselines[name]
+    time_limit = base['ns_per_frame'] * (1 + TIME_THRESHOLD)
+    alloc_limit = (
+        base['bytes_per_frame'] * (1 + ALLOC_THRESHOLD) + ALLOC_SLACK_BYTES
+    )
+    assert ns_per_frame <= time_limit, (
+        f'{name}: {ns_per_frame:.0f} ns/frame exceeds baseline '
+        f"{base['ns_per_frame']:.0f} ns/frame"
+    )
+    assert bytes_per_frame <= alloc_limit, (
+        f'{name}: {bytes_per_frame:.0f} B/frame exceeds baseline '
+        f"{base['bytes_per_frame']:.0f} B/frame"
+    )
+
+
+@pytest.mark.parametrize('chunk_ms', CHUNKS_MS)
+@pytest.mark.parametrize('speakers', SPEAKERS)
+def test_benchmark_mixer(speakers, chunk_ms):
+    mixer = Mixer()
+    pcm = _samples(48000, chunk_ms, channels=2)
+
+    def run():
+        for user_id in range(speakers):
+            mixer.add(user_id, pcm)
+        POOL.release(mixer.pop(chunk_ms))
+
+    frames = chunk_ms // FRAME_MS
+    _check(f'mixer[{speakers}x{chunk_ms}ms]', *_measure(run, frames))
+
+
+@pytest.mark.parametrize('chunk_ms', CHUNKS_MS)
+def test_benchmark_downsample(chunk_ms):
+    pcm = _samples(48000, chunk_ms)
+    frames = chunk_ms // FRAME_MS
+    _check(
+        f'downsample_48k_to_16k[{chunk_ms}ms]',
+        *_measure(lambda: downsample_48k_to_16k(pcm), frames),
+    )
+
+
+@pytest.mark.parametrize('chunk_ms', CHUNKS_MS)
+def test_benchmark_upsample(chunk_ms):
+    pcm = _samples(24000, chunk_ms)
+    frames = chunk_ms // FRAME_MS
+    _check(
+        f'upsample_24k_to_48k[{chunk_ms}ms]',
+        *_measure(lambda: upsample_24k_to_48k(pcm), frames),
+    )
+
+
+@pytest.mark.parametrize('speakers', [5, 20, 50])
+def test_benchmark_multi_speaker_resample(speakers):
+    chunks = {
+        user_id: _samples(48000, FRAME_MS) for user_id in range(speakers)
+    }
+    packed = MultiSpeakerResampler()
+    streams = {
+        user_id: soxr.ResampleStream(
+            48000, 16000, 1, dtype='float32', quality=soxr.LQ
+        )
+        for user_id in chunks
+    }
+
+    def per_user():
+        for user_id, pcm in chunks.items():
+            streams[user_id].resample_chunk(pcm)
+
+    packed_ns, packed_bytes = _measure(lambda: packed.resample(chunks), 1)
+    per_user_ns, per_user_bytes = _measure(per_user, 1)
+    _check(f'resample_packed[{speakers}]', packed_ns, packed_bytes)
+    _check(f'resample_per_user[{speakers}]', per_user_ns, per_user_bytes)
+    # At a handful of speakers the two are within noise of each other.
+    if speakers >= 20:
+        assert packed_ns < per_user_ns
+
+
+def test_benchmark_vad():
+    vad = VAD()
+    frame = (_samples(16000, FRAME_MS) * 32767).astype(np.int16).tobytes()
+    _check(
+        'vad_is_speech[20ms]',
+        *_measure(lambda: vad.is_speech(frame, threshold=-60), 1),
+    )
+
+
+@pytest.mark.parametrize('chunk_ms', CHUNKS_MS)
+def test_benchmark_bridge_conversions(chunk_ms):
+    bridge = object.__new__(DiscordBridge)
+    pcm = _samples(48000, chunk_ms, channels=2)
+    raw = (pcm * 32767).astype(np.int16).tobytes()
+    frames = chunk_ms // FRAME_MS
+    _check(
+        f'bridge_to_float[{chunk_ms}ms]',
+        *_measure(lambda: POOL.release(bridge._to_float(raw)), frames),
+    )
+    _check(
+        f'bridge_to_s16le[{chunk_ms}ms]',
+        *_measure(lambda: bridge._to_s16le(pcm), frames),
+    )
+
+
+def test_benchmark_backpressure_queue():
+    loop = asyncio.new_event_loop()
+    queue = BackpressureQueue(maxsize=100)
+    item = b'\x00' * 640
+
+    async def cycle():
+        for _ in range(50):
+            await queue.put(item)
+        for _ in range(50):
+            await queue.get()
+
+    try:
+        _check(
+            'backpressure_put_get[50]',
+            *_measure(lambda: loop.run_until_complete(cycle()), 50),
+        )
+    finally:
+        loop.close()
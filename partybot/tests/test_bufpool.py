@@ -0,0 +1,126 @@
+import asyncio
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from partybot.audio.mixer import Mixer
+from partybot.audio.scheduler import DSPScheduler
+from partybot.audio.vad import VAD
+import partybot.stream.gemini_session as gs_mod
+from partybot.utils.bufpool import BufferPool, POOL
+from partybot.voice.discord_bridge import DiscordBridge
+
+from test_gemini_session import FakeLiveSession
+
+
+def test_pool_reuses_blocks_by_size_class():
+    pool = BufferPool(min_bytes=256)
+    first = pool.acquire((100, 2))
+    assert first.shape == (100, 2) and first.dtype == np.float32
+    assert pool.release(first)
+    # 400 int16 samples fall in the same 1 KiB class as 800 bytes.
+    second = pool.acquire(400, np.int16)
+    assert second.base is first.base
+    assert pool.free_bytes() == 0
+    assert pool.allocations == 1
+
+
+def test_pool_release_accepts_views_once():
+    pool = BufferPool()
+    buf = pool.zeros(64)
+    assert not np.any(buf)
+    assert pool.release(memoryview(buf[8:]))
+    assert not pool.release(buf)
+    assert not pool.release(np.zeros(64, dtype=np.float32))
+    assert not pool.release(b'\x00' * 64)
+    assert pool.free_bytes() == 256
+
+
+def test_pool_bypasses_large_requests():
+    pool = BufferPool(max_bytes=1024)
+    big = pool.acquire(1024)
+    assert big.base is None
+    assert not pool.release(big)
+    assert pool.allocations == 0
+
+
+@pytest.mark.asyncio
+async def test_steady_state_streaming_allocates_nothing_per_frame(
+    monkeypatch,
+):
+    fake = FakeLiveSession([])
+
+    async def fake_live_session(**kwargs):
+        return fake
+
+    monkeypatch.setattr(
+        gs_mod.genai, 'configure', lambda api_key: None, raising=False
+    )
+    monkeypatch.setattr(
+        gs_mod.genai, 'live_session', fake_live_session, raising=False
+    )
+    gemini = gs_mod.GeminiSession(api_key='k', model_id='m')
+    await gemini.create()
+    gemini.start_send_loop()
+    bridge = object.__new__(DiscordBridge)
+    mixer = Mixer()
+    scheduler = DSPScheduler(tick_ms=20)
+    dsp = scheduler.register(mixer)
+    # Ticks are driven by hand below.
+    scheduler._task.cancel()
+    vad = VAD()
+    rng = np.random.default_rng(0)
+    packets = [
+        (rng.standard_normal(1920) * 3000).astype(np.int16).tobytes()
+        for _ in range(3)
+    ]
+    sent = 0
+
+    async def stream(frames):
+        nonlocal sent
+        for _ in range(frames):
+            for user_id, packet in enumerate(packets):
+                pcm = bridge._to_float(packet)
+                mixer.add(user_id, pcm)
+                POOL.release(pcm)
+            await scheduler.tick()
+            # Streaming resampler output is not frame aligned, so a tick
+            # may produce no frame or two.
+            while dsp.queue.qsize():
+                frame, _ = await dsp.queue.get()
+                samples = gs_mod.to_linear16(frame)
+                POOL.release(frame)
+                vad.is_speech(samples.data)
+                await gemini.send_pcm(samples.data)
+            # Let the send loop hand every frame to the live session.
+            while gemini.in_q.qsize():
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            # The session keeps what it is sent, so it must not be handed
+            # views of pooled buffers that are about to be reused.
+            assert all(type(data) is bytes for data in fake.sent)
+            sent += sum(len(data) for data in fake.sent)
+            fake.sent.clear()
+
+    try:
+        await stream(50)
+        allocations = POOL.allocations
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await stream(200)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        scheduler.close()
+        await gemini.close()
+
+    assert POOL.allocations == allocations
+    # The resampler's filter delay holds back under one frame.
+    assert 249 * 640 <= sent <= 250 * 640
+    # Only small temporaries remain, well under the float audio moved per
+    # frame (three users of 48 kHz stereo).
+    assert peak - baseline < 3 * 960 * 2 * 4
@@ -0,0 +1,98 @@
+import numpy as np
+
+from partybot.audio.catchup import (
+    CatchUpController,
+    time_compress,
+    trim_silences,
+)
+
+RATE = 24000
+
+
+def _tone(seconds, freq=220.0):
+    t = np.arange(int(RATE * seconds), dtype=np.float32) / RATE
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _peak_freq(pcm):
+    spectrum = np.abs(np.fft.rfft(pcm * np.hanning(len(pcm))))
+    return np.fft.rfftfreq(len(pcm), 1 / RATE)[np.argmax(spectrum)]
+
+
+def test_trim_silences_shortens_long_pauses_only():
+    gap = np.zeros(int(RATE * 0.5), dtype=np.float32)
+    short_gap = np.zeros(int(RATE * 0.05), dtype=np.float32)
+    pcm = np.concatenate([_tone(0.2), gap, _tone(0.2), short_gap, _tone(0.2)])
+    trimmed = trim_silences(pcm, RATE, keep_ms=60)
+    removed_ms = (len(pcm) - len(trimmed)) * 1000 / RATE
+    assert 420 <= removed_ms <= 450
+    assert len(trim_silences(_tone(0.3), RATE)) == int(RATE * 0.3)
+
+
+def test_time_compress_keeps_pitch():
+    pcm = _tone(1.0)
+    out = time_compress(pcm, 1.15, RATE)
+    assert abs(len(out) / len(pcm) - 1 / 1.15) < 0.03
+    assert abs(_peak_freq(out) - 220.0) < 3.0
+    assert np.max(np.abs(out)) < 0.6
+
+
+def test_time_compress_ignores_short_or_slow():
+    pcm = _tone(0.01)
+    assert time_compress(pcm, 1.1, RATE) is pcm
+    assert time_compress(_tone(1.0), 1.0, RATE).shape == (RATE,)
+
+
+def test_catch_up_controller():
+    controller = CatchUpController(target_ms=400, max_rate=1.15)
+    pcm = _tone(1.0)
+    assert controller.process(pcm, buffered_ms=200) is pcm
+    out = controller.process(pcm, buffered_ms=3000)
+    assert abs(len(out) / len(pcm) - 1 / 1.15) < 0.03
+
+    gap = np.zeros(int(RATE * 0.5), dtype=np.float32)
+    speech = np.concatenate([_tone(0.3), gap, _tone(0.3)])
+    out = controller.process(speech, buffered_ms=600)
+    # Trimming the pause alone covers the 200 ms excess.
+    assert len(out) < len(speech) - RATE * 0.2
+
+
+def _stream(controller, pcm, chunk_ms, buffered_ms):
+    step = RATE * chunk_ms // 1000
+    pieces = [
+        controller.process(pcm[start:start + step], buffered_ms)
+        for start in range(0, len(pcm), step)
+    ]
+    return np.concatenate(pieces + [controller.flush()])
+
+
+def test_catch_up_streams_seamlessly_across_chunks():
+    pcm = _tone(2.0)
+    # The largest step of the tone itself between adjacent samples.
+    natural = np.max(np.abs(np.diff(pcm)))
+    for chunk_ms in (20, 30, 100):
+        controller = CatchUpController(target_ms=400, max_rate=1.15)
+        out = _stream(controller, pcm, chunk_ms, buffered_ms=3000)
+        assert abs(len(out) / len(pcm) - 1 / 1.15) < 0.02, chunk_ms
+        assert np.max(np.abs(np.diff(out))) < 1.5 * natural, chunk_ms
+        assert abs(_peak_freq(out) - 220.0) < 3.0
+
+    # Catching up, then passing through, then catching up again.
+    controller = CatchUpController(target_ms=400, max_rate=1.15)
+    backlog = [3000, 3000, 0, 0, 3000, 0]
+    step = len(pcm) // len(backlog)
+    out = np.concatenate([
+        controller.process(pcm[i * step:(i + 1) * step], buffered_ms)
+        for i, buffered_ms in enumerate(backlog)
+    ] + [controller.flush()])
+    assert np.max(np.abs(np.diff(out))) < 1.5 * natural
+    assert len(out) < len(pcm)
+
+
+def test_catch_up_trims_pauses_split_across_chunks():
+    gap = np.zeros(int(RATE * 0.5), dtype=np.float32)
+    speech = np.concatenate([_tone(0.3), gap, _tone(0.3)])
+    controller = CatchUpController(target_ms=400, max_rate=1.0)
+    out = _stream(controller, speech, 20, buffered_ms=900)
+    removed_ms = (len(speech) - len(out)) * 1000 / RATE
+    assert 420 <= removed_ms <= 450
@@ -0,0 +1,117 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from partybot.audio.mixer import Mixer
+from partybot.audio.scheduler import DSPScheduler
+from partybot.cog import PartyBot
+from partybot.logging import get_logger
+import partybot.stream.gemini_session as gs_mod
+from partybot.utils.loadshed import LoadShedder
+
+from test_gemini_session import FakeLiveSession
+
+
+class _IdleBridge:
+    async def recv_frames(self):
+        await asyncio.Event().wait()
+        yield
+
+
+class _AlwaysSpeech:
+    def is_speech(self, frame):
+        return True
+
+
+def _cog(scheduler):
+    cog = object.__new__(PartyBot)
+    cog.scheduler = scheduler
+    cog.load_shedder = LoadShedder()
+    cog.logger = get_logger(__name__)
+    return cog
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_capture_suspends_and_replays_preroll_on_resume(monkeypatch):
+    fakes = []
+
+    async def fake_live_session(**kwargs):
+        fakes.append(FakeLiveSession([]))
+        return fakes[-1]
+
+    monkeypatch.setattr(
+        gs_mod.genai, 'configure', lambda api_key: None, raising=False
+    )
+    monkeypatch.setattr(
+        gs_mod.genai, 'live_session', fake_live_session, raising=False
+    )
+    gemini = gs_mod.GeminiSession(api_key='k', model_id='m')
+    await gemini.create()
+    gemini.start_send_loop()
+
+    scheduler = DSPScheduler(tick_ms=20)
+    mixer = Mixer(input_channels=1, headroom_db=0)
+    dsp = scheduler.register(mixer)
+    # Ticks are driven by hand below.
+    scheduler._task.cancel()
+    cog = _cog(scheduler)
+    guild_config = {
+        "input_buffer_ms": 100,
+        "input_buffer_min_ms": 20,
+        "input_buffer_max_ms": 200,
+        "adaptive_buffer": False,
+        "preroll_ms": 200,
+        "silence_level_db": -45,
+        "idle_suspend_s": 0.05,
+    }
+    stats = {}
+    capture = asyncio.create_task(
+        cog._capture_loop(
+            _IdleBridge(),
+            gemini,
+            mixer,
+            dsp,
+            _AlwaysSpeech(),
+            guild_config,
+            stats,
+        )
+    )
+    try:
+        await _settle()
+        await asyncio.sleep(0.06)
+        # Several silent 16 kHz frames are queued when the idle timeout
+        # fires; none of them may reach the pre-roll.
+        for _ in range(4):
+            await scheduler.tick()
+        await _settle()
+        assert stats["suspended"]
+        assert dsp.suspended
+        assert fakes[0].closed
+
+        t = np.arange(960, dtype=np.float32) / 48000
+        speech = (np.sin(2 * np.pi * 440 * t) * 0.5).astype(np.float32)
+        for _ in range(3):
+            await scheduler.tick()
+        mixer.add(1, speech)
+        await scheduler.tick()
+        await _settle()
+        assert not stats["suspended"]
+        assert not dsp.suspended
+        assert len(fakes) == 2
+    finally:
+        capture.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await capture
+        scheduler.close()
+        await gemini.close()
+
+    replay = np.frombuffer(fakes[1].sent[0], dtype=np.int16)
+    # Four 48 kHz frames of pre-roll come back as four 16 kHz frames.
+    assert len(replay) == 4 * 320
+    assert np.max(np.abs(replay[-320:])) > 0.3 * 32767
@@ -32,3 +32,146 @@ def test_to_float_preserves_channels():
         [[0.0, 32767 / 32768.0], [-1.0, 16384 / 32768.0]], dtype=np.float32
     )
     assert np.allclose(result, expected)
+
+
+def test_to_float_direct_16k_is_mono():
+    bridge = object.__new__(DiscordBridge)
+    bridge.channels = 1
+    pcm = np.array([0, 16384, -16384], dtype=np.int16).tobytes()
+    result = bridge._to_float(pcm)
+    assert result.shape == (3, 1)
+    assert np.allclose(result[:, 0], [0.0, 0.5, -0.5])
+
+
+def test_direct_decode_receiver_ignores_pycord_frames():
+    import asyncio
+    from partybot.voice.discord_bridge import _FrameReceiver
+
+    loop = asyncio.new_event_loop()
+    try:
+        receiver = _FrameReceiver(loop, passthrough=False)
+        receiver.write(b'\x00\x00', 1)
+        receiver.push(2, b'\x01\x00')
+        loop.run_until_complete(asyncio.sleep(0))
+        assert receiver.queue.qsize() == 1
+        assert loop.run_until_complete(receiver.get()) == (2, b'\x01\x00')
+    finally:
+        loop.close()
+
+
+def test_opus_lookahead_source_is_bounded():
+    from partybot.voice.discord_bridge import _OpusLookaheadSource
+
+    source = _OpusLookaheadSource(max_packets=3)
+    assert source.is_opus()
+    assert source.push([b'a', b'bb', b'ccc', b'dddd']) == 3
+    assert source.buffered_bytes == 6
+    assert source.read() == b'a'
+    source.cleanup()
+    assert source.push([b'dddd']) == 1
+    assert [source.read() for _ in range(4)] == [b'bb', b'ccc', b'dddd', b'']
+
+
+def test_to_s16le_clips_full_scale():
+    bridge = object.__new__(DiscordBridge)
+    pcm = np.array([1.0, -1.0, 0.5], dtype=np.float32)
+    result = np.frombuffer(bridge._to_s16le(pcm), dtype=np.int16)
+    assert list(result) == [32767, 32767, -32768, -32768, 16384, 16384]
+
+
+class _FakeEncoder:
+    def encode(self, data, frame_size):
+        return bytes(data)
+
+
+class _FakeVoiceClient:
+    def __init__(self, loop):
+        self.loop = loop
+        self.playing = False
+        self.after = None
+        self.plays = 0
+
+    def is_connected(self):
+        return True
+
+    def is_playing(self):
+        return self.playing
+
+    def play(self, source, after=None):
+        self.plays += 1
+        self.playing = True
+        self.after = after
+
+
+def test_packet_encoder_flush_pads_partial_frame(monkeypatch):
+    from partybot.voice.discord_bridge import _PacketEncoder
+
+    monkeypatch.setattr(
+        discord,
+        'opus',
+        types.SimpleNamespace(Encoder=_FakeEncoder),
+        raising=False,
+    )
+    encoder = _PacketEncoder()
+    frame = _PacketEncoder.FRAME_BYTES
+    assert len(encoder.encode(b'\x01' * (frame + 100))) == 1
+    assert encoder.pending_bytes == 100
+    (tail,) = encoder.flush()
+    assert tail == b'\x01' * 100 + b'\x00' * (frame - 100)
+    assert encoder.pending_bytes == 0
+    assert encoder.flush() == []
+
+
+def test_player_restarts_after_stopping_with_packets_or_tail(monkeypatch):
+    import asyncio
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from partybot.voice.discord_bridge import (
+        _OpusLookaheadSource,
+        _PacketEncoder,
+    )
+
+    monkeypatch.setattr(
+        discord,
+        'opus',
+        types.SimpleNamespace(Encoder=_FakeEncoder),
+        raising=False,
+    )
+
+    async def scenario():
+        vc = _FakeVoiceClient(asyncio.get_running_loop())
+        bridge = object.__new__(DiscordBridge)
+        bridge._vc = vc
+        bridge._source = _OpusLookaheadSource()
+        bridge._encoder = None
+        bridge._encode_pool = ThreadPoolExecutor(max_workers=1)
+        bridge._closed = False
+
+        async def player_stops():
+            vc.playing = False
+            stopper = threading.Thread(target=vc.after, args=(None,))
+            stopper.start()
+            stopper.join()
+            for _ in range(20):
+                await asyncio.sleep(0.005)
+
+        frame = _PacketEncoder.FRAME_BYTES // 4
+        await bridge.play_pcm(np.zeros(frame + 10, dtype=np.float32))
+        assert vc.plays == 1
+        # The player has read b"" but still reports playing when the next
+        # packet arrives, so it is not restarted straight away.
+        bridge._source.read()
+        await bridge.play_pcm(np.zeros(frame, dtype=np.float32))
+        assert vc.plays == 1
+        await player_stops()
+        assert vc.plays == 2
+
+        # Once the lookahead is empty the carried tail is padded and played.
+        bridge._source.read()
+        await player_stops()
+        assert vc.plays == 3
+        assert len(bridge._source) == 1
+        assert bridge._encoder.pending_bytes == 0
+        bridge.close()
+
+    asyncio.run(scenario())
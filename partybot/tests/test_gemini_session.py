@@ -89,3 +89,69 @@ async def test_gemini_session_send_receive(monkeypatch):
     iter_task.cancel()
     await session.close()
     assert fake.closed
+
+
+@pytest.mark.asyncio
+async def test_gemini_session_close_ends_iteration_and_reopens(monkeypatch):
+    fakes = []
+
+    async def fake_live_session(**kwargs):
+        fakes.append(FakeLiveSession([]))
+        return fakes[-1]
+
+    monkeypatch.setattr(
+        gs_mod.genai,
+        'configure',
+        lambda api_key: None,
+        raising=False,
+    )
+    monkeypatch.setattr(
+        gs_mod.genai,
+        'live_session',
+        fake_live_session,
+        raising=False,
+    )
+
+    session = gs_mod.GeminiSession(api_key='k', model_id='m')
+    await session.create()
+
+    async def drain():
+        return [chunk async for chunk in session.iter_audio()]
+
+    iter_task = asyncio.create_task(drain())
+    await asyncio.sleep(0.01)
+    await session.close()
+    assert await asyncio.wait_for(iter_task, 1) == []
+
+    waiter = asyncio.create_task(session.wait_until_open())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    await session.create()
+    await asyncio.wait_for(waiter, 1)
+    assert len(fakes) == 2
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_gemini_session_close_drops_stale_audio(monkeypatch):
+    async def fake_live_session(**kwargs):
+        return FakeLiveSession([])
+
+    monkeypatch.setattr(
+        gs_mod.genai,
+        'configure',
+        lambda api_key: None,
+        raising=False,
+    )
+    monkeypatch.setattr(
+        gs_mod.genai,
+        'live_session',
+        fake_live_session,
+        raising=False,
+    )
+
+    session = gs_mod.GeminiSession(api_key='k', model_id='m')
+    await session.create()
+    await session.out_q.put(b'stale')
+    await session.close()
+    assert session.out_q.drain() == [None]
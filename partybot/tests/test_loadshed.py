@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import pytest
+
+from partybot.utils.loadshed import LoadShedder, LoopLagMonitor
+
+
+def test_load_shedder_steps_down_and_up():
+    shedder = LoadShedder(degrade_after=2, recover_after=3)
+    for _ in range(4):
+        shedder.observe(lag_ms=100.0, dsp_ms=1.0)
+    assert shedder.level == LoadShedder.CHEAP_RESAMPLE
+    assert shedder.level_name == "cheap_resample"
+
+    for _ in range(20):
+        shedder.observe(lag_ms=0.0, dsp_ms=20.0)
+    assert shedder.level == LoadShedder.NO_NEW_JOINS
+
+    for _ in range(3):
+        shedder.observe(lag_ms=1.0, dsp_ms=1.0)
+    assert shedder.level == LoadShedder.FEWER_SPEAKERS
+
+
+def test_load_shedder_holds_between_thresholds():
+    shedder = LoadShedder(degrade_after=2, recover_after=2)
+    shedder.observe(lag_ms=100.0, dsp_ms=1.0)
+    shedder.observe(lag_ms=20.0, dsp_ms=1.0)
+    shedder.observe(lag_ms=100.0, dsp_ms=1.0)
+    assert shedder.level == LoadShedder.NORMAL
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_detects_blocking():
+    monitor = LoopLagMonitor(interval_ms=10)
+
+    async def block():
+        await asyncio.sleep(0)
+        time.sleep(0.05)
+
+    blocker = asyncio.create_task(block())
+    lag = await monitor.sample()
+    await blocker
+    assert lag >= 30.0
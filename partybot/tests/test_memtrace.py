@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from partybot.audio.mixer import Mixer
+from partybot.utils.backpressure import BackpressureQueue
+from partybot.utils.memtrace import MemoryTracer
+
+
+def test_buffered_bytes_accounting():
+    mixer = Mixer(input_channels=1)
+    mixer.add(1, np.zeros(480, dtype=np.float32))
+    mixer.add(2, np.zeros(240, dtype=np.float32))
+    assert mixer.buffered_bytes() == 720 * 4
+    mixer.pop(5)
+    assert mixer.buffered_bytes() == 240 * 4
+
+    queue = BackpressureQueue(maxsize=4)
+    queue._queue.extend([b'abc', (np.zeros(2, dtype=np.int16), 1.0)])
+    assert queue.buffered_bytes() == 7
+
+
+def test_memory_tracer_attributes_package_lines():
+    tracer = MemoryTracer()
+    with pytest.raises(RuntimeError):
+        tracer.top()
+    tracer.start()
+    try:
+        mixer = Mixer(input_channels=1)
+        mixer.add(1, np.ones(48000, dtype=np.float64))
+        _, rows = tracer.top(5)
+    finally:
+        tracer.stop()
+
+    location, size, diff = rows[0]
+    assert location.startswith('partybot/audio/mixer.py:')
+    assert size >= 48000 * 4
+    assert diff >= 48000 * 4
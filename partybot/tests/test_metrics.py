@@ -0,0 +1,92 @@
+import socket
+
+import pytest
+
+from partybot.utils.backpressure import BackpressureQueue
+from partybot.utils.metrics import MetricsRegistry, MetricsServer, REGISTRY
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter('bytes_total', 'Bytes seen.')
+    gauge = registry.gauge('depth', 'Queue depth.', ['queue'])
+    histogram = registry.histogram(
+        'tick_seconds', 'Tick time.', buckets=[0.1, 1]
+    )
+    counter.inc(5)
+    gauge.set(3, queue='in"q')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+
+    text = registry.render()
+    assert '# TYPE bytes_total counter\nbytes_total 5\n' in text
+    assert 'depth{queue="in\\"q"} 3' in text
+    assert 'tick_seconds_bucket{le="0.1"} 1' in text
+    assert 'tick_seconds_bucket{le="1"} 2' in text
+    assert 'tick_seconds_bucket{le="+Inf"} 2' in text
+    assert 'tick_seconds_count 2' in text
+    assert 'tick_seconds_sum 0.55' in text
+
+    assert registry.counter('bytes_total', 'Bytes seen.') is counter
+    with pytest.raises(ValueError):
+        registry.gauge('bytes_total', 'Bytes seen.')
+    with pytest.raises(ValueError):
+        gauge.set(1)
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_registry_renders_special_values_and_help():
+    registry = MetricsRegistry()
+    gauge = registry.gauge('level_db', 'Level in "dB"\\peak\nsmoothed.', ['k'])
+    gauge.set(float('-inf'), k='silent')
+    gauge.set(float('nan'), k='unknown')
+    gauge.set(float('inf'), k='loud')
+
+    text = registry.render()
+    assert '# HELP level_db Level in "dB"\\\\peak\\nsmoothed.\n' in text
+    assert 'level_db{k="silent"} -Inf' in text
+    assert 'level_db{k="unknown"} NaN' in text
+    assert 'level_db{k="loud"} +Inf' in text
+
+
+def test_registry_runs_collectors():
+    registry = MetricsRegistry()
+    gauge = registry.gauge('sessions', 'Sessions.')
+    registry.add_collector(lambda: gauge.set(7))
+    assert 'sessions 7' in registry.render()
+
+
+@pytest.mark.asyncio
+async def test_named_queue_counts_drops():
+    queue = BackpressureQueue(maxsize=1, name='test_drops')
+    await queue.put(1)
+    await queue.put(2)
+    assert queue.dropped == 1
+    assert 'partybot_queue_dropped_total{queue="test_drops"} 1' in (
+        REGISTRY.render()
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_registry():
+    aiohttp = pytest.importorskip('aiohttp')
+    registry = MetricsRegistry()
+    registry.counter('hits_total', 'Hits.').inc()
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    server = MetricsServer(registry, port=port)
+    await server.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            url = f'http://127.0.0.1:{port}/metrics'
+            async with session.get(url) as resp:
+                body = await resp.text()
+                content_type = resp.headers['Content-Type']
+    finally:
+        await server.stop()
+    assert 'hits_total 1' in body
+    assert content_type.startswith('text/plain; version=0.0.4')
+    assert not server.running
@@ -27,3 +27,16 @@ def test_mixer_headroom_and_clear():
     mixer.add(user_id=1, pcm_data=np.full((1, 1), 0.5, dtype=np.float32))
     mixer.clear()
     assert np.allclose(mixer.pop(1000), np.zeros(4))
+
+
+def test_mixer_max_speakers_keeps_loudest():
+    mixer = Mixer(sample_rate=10, input_channels=1, headroom_db=0)
+    mixer.add(user_id=1, pcm_data=np.full((4, 1), 0.1, dtype=np.float32))
+    mixer.add(user_id=2, pcm_data=np.full((4, 1), 0.5, dtype=np.float32))
+    mixer.add(user_id=3, pcm_data=np.full((4, 1), 0.2, dtype=np.float32))
+
+    out = np.zeros(2, dtype=np.float32)
+    mixer.mix_into(out, max_speakers=2)
+    assert np.allclose(out, 0.7)
+    # The skipped speaker was advanced in step with the others
+    assert mixer.buffered_bytes() == 3 * 2 * 4
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+import soxr
+
+from partybot.audio.resample import MultiSpeakerResampler
+
+
+def _chunks(rng, speakers, frames=960):
+    return {
+        user_id: rng.standard_normal(frames).astype(np.float32) * 0.1
+        for user_id in speakers
+    }
+
+
+def test_multi_speaker_matches_per_speaker_streams():
+    rng = np.random.default_rng(1)
+    packed = MultiSpeakerResampler(initial_channels=4)
+    single = {
+        user_id: soxr.ResampleStream(
+            48000, 16000, 1, dtype='float32', quality=soxr.LQ
+        )
+        for user_id in (1, 2, 3)
+    }
+    for _ in range(5):
+        chunks = _chunks(rng, (1, 2, 3))
+        result = packed.resample(chunks)
+        for user_id, pcm in chunks.items():
+            expected = single[user_id].resample_chunk(pcm)
+            assert np.allclose(result[user_id], expected, atol=1e-6)
+
+
+def test_multi_speaker_grows_and_reuses_slots():
+    rng = np.random.default_rng(2)
+    resampler = MultiSpeakerResampler(initial_channels=2)
+    result = resampler.resample(_chunks(rng, range(5)))
+    assert set(result) == set(range(5))
+    assert resampler._capacity == 5
+
+    resampler.release(0)
+    resampler.resample(_chunks(rng, [9]))
+    assert resampler._slots[9] == 0
+
+
+def test_multi_speaker_rejects_ragged_chunks():
+    resampler = MultiSpeakerResampler()
+    with pytest.raises(ValueError):
+        resampler.resample({1: np.zeros(960), 2: np.zeros(480)})
+
+
+def test_multi_speaker_reused_slot_does_not_leak_previous_speaker():
+    resampler = MultiSpeakerResampler(initial_channels=2)
+    loud = np.full(960, 0.9, dtype=np.float32)
+    silence = np.zeros(960, dtype=np.float32)
+
+    def newcomer_output(speaker_id, chunks):
+        return np.concatenate([
+            resampler.resample({2: silence, speaker_id: silence})[speaker_id]
+            for _ in range(chunks)
+        ])
+
+    for _ in range(5):
+        resampler.resample({1: loud, 2: silence})
+    resampler.release(1)
+    # Joining straight away must not inherit the loud speaker's filter.
+    assert np.max(np.abs(newcomer_output(3, 3))) < 1e-4
+
+    resampler.release(3)
+    for _ in range(5):
+        resampler.resample({1: loud, 2: silence})
+    resampler.release(1)
+    capacity = resampler._capacity
+    for _ in range(5):
+        resampler.resample({2: silence})
+    # Once drained a slot is handed out again, and it is clean.
+    output = newcomer_output(4, 3)
+    assert resampler._capacity == capacity
+    assert np.max(np.abs(output)) < 1e-4
+
+
+def test_multi_speaker_quality_change_and_growth_steps():
+    resampler = MultiSpeakerResampler(initial_channels=1, growth=4)
+    chunk = np.zeros(960, dtype=np.float32)
+    resampler.resample({1: chunk, 2: chunk})
+    assert resampler._capacity == 5
+    stream = resampler._stream
+    resampler.resample({1: chunk, 2: chunk, 3: chunk})
+    assert resampler._stream is stream
+
+    resampler.quality = soxr.LQ
+    assert resampler._stream is stream
+    resampler.quality = soxr.HQ
+    assert resampler.quality == soxr.HQ
+    assert resampler._stream is None
@@ -0,0 +1,158 @@
+import asyncio
+
+import numpy as np
+import pytest
+import soxr
+
+from partybot.audio.mixer import Mixer
+from partybot.audio.scheduler import DSPScheduler
+from partybot.utils.loadshed import LoadShedder
+
+
+@pytest.mark.asyncio
+async def test_scheduler_dispatches_each_session():
+    scheduler = DSPScheduler(tick_ms=20)
+    loud = Mixer(input_channels=1, headroom_db=0)
+    quiet = Mixer(input_channels=1, headroom_db=0)
+    t = np.arange(960, dtype=np.float32) / 48000
+    loud.add(1, np.sin(2 * np.pi * 440 * t) * 0.5)
+
+    loud_handle = scheduler.register(loud)
+    quiet_handle = scheduler.register(quiet)
+    try:
+        frame, level = await asyncio.wait_for(loud_handle.queue.get(), 1)
+        silent, silent_level = await asyncio.wait_for(
+            quiet_handle.queue.get(), 1
+        )
+    finally:
+        scheduler.close()
+
+    assert frame.shape == (320,)
+    assert silent.shape == (320,)
+    assert -12 < level < -3
+    assert silent_level == -np.inf
+    assert not np.any(silent)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_stops_when_empty():
+    scheduler = DSPScheduler()
+    handle = scheduler.register(Mixer())
+    await asyncio.wait_for(handle.queue.get(), 1)
+    scheduler.unregister(handle)
+    await asyncio.sleep(0.05)
+    assert scheduler._task.done()
+    scheduler.close()
+
+
+def test_scheduler_rejects_unsupported_rate():
+    scheduler = DSPScheduler(sample_rate=48000)
+    with pytest.raises(ValueError):
+        scheduler.register(Mixer(sample_rate=44100))
+
+
+@pytest.mark.asyncio
+async def test_scheduler_passes_16k_mixers_through():
+    scheduler = DSPScheduler(tick_ms=20)
+    mixer16 = Mixer(sample_rate=16000, input_channels=1, headroom_db=0)
+    mixer16.add(1, np.full(320, 0.25, dtype=np.float32))
+    handle16 = scheduler.register(mixer16)
+    handle48 = scheduler.register(Mixer())
+    try:
+        frame16, level16 = await asyncio.wait_for(handle16.queue.get(), 1)
+        frame48, _ = await asyncio.wait_for(handle48.queue.get(), 1)
+    finally:
+        scheduler.close()
+    assert np.allclose(frame16, 0.25)
+    assert level16 == pytest.approx(20 * np.log10(0.25), abs=0.01)
+    assert frame48.shape == (320,)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_skips_resampling_suspended_sessions():
+    scheduler = DSPScheduler(tick_ms=20)
+    handle = scheduler.register(Mixer(input_channels=1))
+    handle.suspended = True
+    try:
+        frame, level = await asyncio.wait_for(handle.queue.get(), 1)
+    finally:
+        scheduler.close()
+    assert frame.shape == (960,)
+    assert level == -np.inf
+
+
+@pytest.mark.asyncio
+async def test_scheduler_resamples_consecutive_ticks_seamlessly():
+    scheduler = DSPScheduler(tick_ms=20)
+    mixer = Mixer(input_channels=1, headroom_db=0)
+    t = np.arange(960 * 25, dtype=np.float32) / 48000
+    signal = (np.sin(2 * np.pi * 440 * t) * 0.5).astype(np.float32)
+    for start in range(0, len(signal), 960):
+        mixer.add(1, signal[start:start + 960])
+    handle = scheduler.register(mixer)
+    scheduler._task.cancel()
+    try:
+        frames = []
+        for _ in range(25):
+            await scheduler.tick()
+            while handle.queue.qsize():
+                frame, _ = await handle.queue.get()
+                assert frame.shape == (320,)
+                frames.append(frame)
+    finally:
+        scheduler.close()
+
+    streamed = np.concatenate(frames)
+    expected = soxr.resample(signal, 48000, 16000, quality=soxr.LQ)
+    assert len(streamed) >= 7000
+    # Per-tick resampling restarted the filter every 20 ms and left a step
+    # at each boundary; one continuous stream matches a one-shot resample.
+    assert np.max(np.abs(streamed - expected[:len(streamed)])) < 1e-3
+
+
+@pytest.mark.asyncio
+async def test_scheduler_resets_tick_time_when_stopped():
+    scheduler = DSPScheduler()
+    handle = scheduler.register(Mixer())
+    await asyncio.wait_for(handle.queue.get(), 1)
+    # A slow last tick must not keep the shedder degraded once idle.
+    scheduler._last_tick_ms = 50.0
+    scheduler.unregister(handle)
+    await asyncio.sleep(0.05)
+    assert scheduler._task.done()
+    assert scheduler.last_tick_ms == 0.0
+
+    shedder = LoadShedder(degrade_after=1, recover_after=2)
+    shedder.observe(lag_ms=0.0, dsp_ms=50.0)
+    assert shedder.level == LoadShedder.LARGER_CHUNKS
+    for _ in range(2):
+        shedder.observe(lag_ms=0.0, dsp_ms=scheduler.last_tick_ms)
+    assert shedder.level == LoadShedder.NORMAL
+    scheduler.close()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_longer_ticks_still_yield_frames():
+    scheduler = DSPScheduler(tick_ms=20)
+    mixer16 = Mixer(sample_rate=16000, input_channels=1, headroom_db=0)
+    mixer16.add(1, np.full(960, 0.25, dtype=np.float32))
+    handle16 = scheduler.register(mixer16)
+    handle48 = scheduler.register(Mixer(input_channels=1))
+    handle48.suspended = True
+    scheduler._task.cancel()
+    with pytest.raises(ValueError):
+        scheduler.tick_ms = 50
+    scheduler.tick_ms = 60
+    try:
+        await scheduler.tick()
+    finally:
+        scheduler.close()
+
+    assert handle16.queue.qsize() == 3
+    assert handle48.queue.qsize() == 3
+    for _ in range(3):
+        frame16, level16 = await handle16.queue.get()
+        frame48, _ = await handle48.queue.get()
+        assert np.allclose(frame16, 0.25)
+        assert level16 == pytest.approx(20 * np.log10(0.25), abs=0.01)
+        assert frame48.shape == (960,)
@@ -0,0 +1,56 @@
+class AdaptiveChunkController:
+    """Picks the capture chunk size from send queue depth and send latency.
+
+    The chunk shrinks towards ``min_ms`` while the Gemini send queue is empty
+    and sends complete quickly, and grows towards ``max_ms`` when the queue
+    backs up or send latency rises.  Sizes are kept on a ``step_ms`` grid so
+    they always line up with Discord's 20 ms frames.
+    """
+
+    def __init__(
+        self,
+        initial_ms: int = 100,
+        min_ms: int = 20,
+        max_ms: int = 200,
+        step_ms: int = 20,
+        high_queue_depth: int = 3,
+        low_latency_ms: float = 50.0,
+        high_latency_ms: float = 150.0,
+    ):
+        if min_ms <= 0 or max_ms < min_ms:
+            raise ValueError("Chunk bounds must satisfy 0 < min_ms <= max_ms")
+        self._min_ms = min_ms
+        self._max_ms = max_ms
+        self._step_ms = step_ms
+        self._high_queue_depth = high_queue_depth
+        self._low_latency_ms = low_latency_ms
+        self._high_latency_ms = high_latency_ms
+        self._chunk_ms = self._clamp(initial_ms)
+
+    @property
+    def chunk_ms(self) -> int:
+        """The currently selected chunk size in milliseconds."""
+        return self._chunk_ms
+
+    def set_bounds(self, min_ms: int, max_ms: int):
+        """Changes the allowed range, re-clamping the current size."""
+        if min_ms <= 0 or max_ms < min_ms:
+            raise ValueError("Chunk bounds must satisfy 0 < min_ms <= max_ms")
+        self._min_ms = min_ms
+        self._max_ms = max_ms
+        self._chunk_ms = self._clamp(self._chunk_ms)
+
+    def update(self, queue_depth: int, send_latency_ms: float) -> int:
+        """Adjusts and returns the chunk size for the next capture."""
+        if (
+            queue_depth >= self._high_queue_depth
+            or send_latency_ms > self._high_latency_ms
+        ):
+            self._chunk_ms = self._clamp(self._chunk_ms + self._step_ms)
+        elif queue_depth == 0 and send_latency_ms < self._low_latency_ms:
+            self._chunk_ms = self._clamp(self._chunk_ms - self._step_ms)
+        return self._chunk_ms
+
+    def _clamp(self, chunk_ms: int) -> int:
+        chunk_ms = round(chunk_ms / self._step_ms) * self._step_ms
+        return max(self._min_ms, min(self._max_ms, chunk_ms))
@@ -1,21 +1,47 @@
 
 import asyncio
 from collections import deque
-from typing import TypeVar, Generic
+from typing import Optional, TypeVar, Generic
+
+from partybot.utils.metrics import REGISTRY
 
 T = TypeVar("T")
 
+QUEUE_DROPS = REGISTRY.counter(
+    "partybot_queue_dropped_total",
+    "Items dropped from full backpressure queues.",
+    ["queue"],
+)
+
+
+def _sizeof(item) -> int:
+    """Best-effort payload size of a queued item in bytes."""
+    if isinstance(item, (tuple, list)):
+        return sum(_sizeof(part) for part in item)
+    nbytes = getattr(item, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    if isinstance(item, (bytes, bytearray)):
+        return len(item)
+    return 0
+
 
 class BackpressureQueue(Generic[T]):
     """A queue with a maximum size that drops the oldest items when full."""
 
-    def __init__(self, maxsize: int):
+    def __init__(self, maxsize: int, name: Optional[str] = None):
         self._queue = deque(maxlen=maxsize)
         self._maxsize = maxsize
         self._event = asyncio.Event()
+        self._name = name
+        self.dropped = 0
 
     async def put(self, item: T):
         """Puts an item into the queue."""
+        if len(self._queue) == self._maxsize:
+            self.dropped += 1
+            if self._name is not None:
+                QUEUE_DROPS.inc(queue=self._name)
         self._queue.append(item)
         self._event.set()
 
@@ -30,6 +56,16 @@ class BackpressureQueue(Generic[T]):
         """Returns the number of items in the queue."""
         return len(self._queue)
 
+    def buffered_bytes(self) -> int:
+        """Returns the payload bytes currently held by the queue."""
+        return sum(_sizeof(item) for item in self._queue)
+
+    def drain(self) -> list:
+        """Removes and returns every queued item without waiting."""
+        items = list(self._queue)
+        self._queue.clear()
+        return items
+
     def clear(self):
         """Clears the queue."""
         self._queue.clear()
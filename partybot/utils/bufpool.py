@@ -0,0 +1,104 @@
+from collections import deque
+from typing import Deque, Dict, Tuple, Union
+
+import numpy as np
+
+from partybot.utils.metrics import REGISTRY
+
+POOL_ALLOCATIONS = REGISTRY.counter(
+    "partybot_bufpool_allocations_total",
+    "Blocks newly allocated by the shared audio buffer pool.",
+)
+
+Shape = Union[int, Tuple[int, ...]]
+
+
+class _Block(bytearray):
+    """Storage behind pooled arrays, flagged while lent out."""
+
+    __slots__ = ("lent",)
+
+
+class BufferPool:
+    """Recycles audio buffers in power-of-two size classes.
+
+    :meth:`acquire` hands out an uninitialised array backed by a pooled
+    block, and :meth:`release` returns that block once the array, or any
+    view or ``memoryview`` of it, is no longer used.  Blocks that are never
+    released are garbage collected as usual, and requests larger than
+    ``max_bytes`` bypass the pool.  Not thread-safe; use it from the event
+    loop thread.
+    """
+
+    def __init__(
+        self,
+        min_bytes: int = 256,
+        max_bytes: int = 1 << 20,
+        max_free: int = 64,
+    ):
+        self._min_bytes = min_bytes
+        self._max_bytes = max_bytes
+        self._max_free = max_free
+        self._free: Dict[int, Deque[_Block]] = {}
+        self._itemsizes: Dict[object, int] = {}
+        self.allocations = 0
+
+    def acquire(self, shape: Shape, dtype=np.float32) -> np.ndarray:
+        """Borrows an uninitialised array of ``shape`` and ``dtype``."""
+        # This runs several times per frame, so it avoids numpy helpers
+        # whose overhead would exceed that of a fresh allocation.
+        itemsize = self._itemsizes.get(dtype)
+        if itemsize is None:
+            itemsize = self._itemsizes[dtype] = np.dtype(dtype).itemsize
+        nbytes = itemsize
+        for dim in (shape,) if type(shape) is int else shape:
+            nbytes *= dim
+        if nbytes > self._max_bytes:
+            return np.empty(shape, dtype=dtype)
+
+        size = self._min_bytes
+        if nbytes > size:
+            size = 1 << (nbytes - 1).bit_length()
+        free = self._free.get(size)
+        if free:
+            block = free.pop()
+        else:
+            block = _Block(size)
+            self._free.setdefault(size, deque())
+            self.allocations += 1
+            POOL_ALLOCATIONS.inc()
+        block.lent = True
+        return np.ndarray(shape, dtype, block)
+
+    def zeros(self, shape: Shape, dtype=np.float32) -> np.ndarray:
+        """Borrows a zero-filled array of ``shape`` and ``dtype``."""
+        buf = self.acquire(shape, dtype)
+        buf.fill(0)
+        return buf
+
+    def release(self, buf) -> bool:
+        """Returns the block behind ``buf`` to the pool.
+
+        Returns ``False`` when ``buf`` was not borrowed from this pool or has
+        already been released.
+        """
+        if type(buf) is memoryview:
+            buf = buf.obj
+        while type(buf) is np.ndarray:
+            buf = buf.base
+        # Foreign buffers and blocks already returned are ignored rather
+        # than handing one block to two borrowers.
+        if type(buf) is not _Block or not buf.lent:
+            return False
+        buf.lent = False
+        free = self._free[len(buf)]
+        if len(free) < self._max_free:
+            free.append(buf)
+        return True
+
+    def free_bytes(self) -> int:
+        """Returns the bytes held by idle blocks."""
+        return sum(size * len(free) for size, free in self._free.items())
+
+
+POOL = BufferPool()
@@ -0,0 +1,86 @@
+import asyncio
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping coroutine."""
+
+    def __init__(self, interval_ms: float = 100.0):
+        self._interval = interval_ms / 1000.0
+
+    async def sample(self) -> float:
+        """Sleeps one interval and returns the oversleep in milliseconds."""
+        loop = asyncio.get_running_loop()
+        expected = loop.time() + self._interval
+        await asyncio.sleep(self._interval)
+        return max(0.0, (loop.time() - expected) * 1000.0)
+
+
+class LoadShedder:
+    """Steps through degradation levels based on loop lag and DSP time.
+
+    Each level includes the ones below it.  The level rises after
+    ``degrade_after`` consecutive overloaded samples and falls after
+    ``recover_after`` consecutive healthy ones, so it does not flap while
+    load hovers around a threshold.
+    """
+
+    NORMAL = 0
+    LARGER_CHUNKS = 1
+    CHEAP_RESAMPLE = 2
+    FEWER_SPEAKERS = 3
+    NO_NEW_JOINS = 4
+    LEVEL_NAMES = (
+        "normal",
+        "larger_chunks",
+        "cheap_resample",
+        "fewer_speakers",
+        "no_new_joins",
+    )
+
+    def __init__(
+        self,
+        lag_high_ms: float = 50.0,
+        lag_low_ms: float = 10.0,
+        dsp_high_ms: float = 10.0,
+        dsp_low_ms: float = 4.0,
+        degrade_after: int = 3,
+        recover_after: int = 20,
+    ):
+        self._lag_high_ms = lag_high_ms
+        self._lag_low_ms = lag_low_ms
+        self._dsp_high_ms = dsp_high_ms
+        self._dsp_low_ms = dsp_low_ms
+        self._degrade_after = degrade_after
+        self._recover_after = recover_after
+        self._level = self.NORMAL
+        self._overloaded = 0
+        self._healthy = 0
+
+    @property
+    def level(self) -> int:
+        """The current degradation level."""
+        return self._level
+
+    @property
+    def level_name(self) -> str:
+        """A readable name for the current degradation level."""
+        return self.LEVEL_NAMES[self._level]
+
+    def observe(self, lag_ms: float, dsp_ms: float) -> int:
+        """Feeds one measurement and returns the resulting level."""
+        if lag_ms > self._lag_high_ms or dsp_ms > self._dsp_high_ms:
+            self._healthy = 0
+            self._overloaded += 1
+            if self._overloaded >= self._degrade_after:
+                self._overloaded = 0
+                self._level = min(self._level + 1, self.NO_NEW_JOINS)
+        elif lag_ms < self._lag_low_ms and dsp_ms < self._dsp_low_ms:
+            self._overloaded = 0
+            self._healthy += 1
+            if self._healthy >= self._recover_after:
+                self._healthy = 0
+                self._level = max(self._level - 1, self.NORMAL)
+        else:
+            self._overloaded = 0
+            self._healthy = 0
+        return self._level
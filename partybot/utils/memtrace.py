@@ -0,0 +1,96 @@
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+_POOL_FILE = Path(__file__).resolve().with_name("bufpool.py")
+
+
+class MemoryTracer:
+    """Diffs ``tracemalloc`` snapshots of allocations made by PartyBot.
+
+    Allocations are attributed to the innermost stack frame inside the
+    package, so memory allocated by numpy or soxr on behalf of PartyBot code
+    is reported against the PartyBot line that requested it.  Frames in
+    the buffer pool are skipped the same way, so pooled blocks are charged
+    to the code that borrowed them.
+    """
+
+    def __init__(self, package_dir: Path = PACKAGE_DIR, frames: int = 25):
+        self._package_dir = package_dir
+        self._pattern = str(package_dir / "*")
+        self._frames = frames
+        self._started_tracing = False
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._previous_time = 0.0
+
+    @property
+    def active(self) -> bool:
+        """Whether allocations are currently being traced."""
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Starts tracing and records the baseline snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self._frames)
+            self._started_tracing = True
+        self._previous = self._snapshot()
+        self._previous_time = time.monotonic()
+
+    def stop(self):
+        """Stops tracing if this tracer started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._previous = None
+
+    def top(self, limit: int = 10) -> Tuple[float, List[Tuple[str, int, int]]]:
+        """Returns the top allocators since the previous call.
+
+        The result is ``(seconds_elapsed, [(location, size, size_diff)])``
+        sorted by growth; the new snapshot becomes the next baseline.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("Memory tracing is not active")
+        snapshot = self._snapshot()
+        now = time.monotonic()
+        elapsed = now - self._previous_time
+
+        current = self._by_location(snapshot)
+        previous = (
+            self._by_location(self._previous) if self._previous else {}
+        )
+        self._previous = snapshot
+        self._previous_time = now
+
+        rows = [
+            (location, size, size - previous.get(location, 0))
+            for location, size in current.items()
+        ]
+        rows.sort(key=lambda row: (abs(row[2]), row[1]), reverse=True)
+        return elapsed, rows[:limit]
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(True, self._pattern, all_frames=True)]
+        )
+
+    def _by_location(self, snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+        sizes: Dict[str, int] = {}
+        for stat in snapshot.statistics("traceback"):
+            location = self._owner(stat.traceback)
+            sizes[location] = sizes.get(location, 0) + stat.size
+        return sizes
+
+    def _owner(self, traceback: tracemalloc.Traceback) -> str:
+        # Frames are ordered oldest first, so walk from the allocation site.
+        for frame in reversed(traceback):
+            path = Path(frame.filename)
+            if path == _POOL_FILE:
+                continue
+            if path.is_relative_to(self._package_dir):
+                relative = path.relative_to(self._package_dir.parent)
+                return f"{relative}:{frame.lineno}"
+        frame = traceback[-1]
+        return f"{frame.filename}:{frame.lineno}"
@@ -1,12 +1,18 @@
 
 import asyncio
-import io
+import ctypes
+import queue
+import threading
 import types
-from typing import AsyncIterator, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple
 
 import discord
 import numpy as np
 
+from partybot.utils.bufpool import POOL
+
 # Older versions of discord.py don't ship with the voice receiving "sinks"
 # module that py-cord provides.  When PartyBot is loaded in an environment
 # without ``discord.sinks`` we create a very small stub so the cog can load
@@ -33,16 +39,37 @@ if not hasattr(discord, "sinks"):
 class _FrameReceiver(discord.sinks.Sink):
     """Sink that forwards PCM frames to an asyncio queue."""
 
-    def __init__(self, loop: asyncio.AbstractEventLoop):
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, passthrough: bool = True
+    ):
         super().__init__()
         self.loop = loop
         self.queue: asyncio.Queue[Tuple[int, bytes]] = asyncio.Queue()
+        self.buffered_bytes = 0
+        # When False, frames decoded by py-cord are ignored because a
+        # _Opus16kDecodeManager pushes its own frames instead.
+        self.passthrough = passthrough
 
     @discord.sinks.core.Filters.container  # type: ignore[attr-defined]
     def write(self, data: bytes, user: int):
         # pragma: no cover - runs in thread
         # Called in a separate thread by py-cord
-        self.loop.call_soon_threadsafe(self.queue.put_nowait, (user, data))
+        if self.passthrough:
+            self.push(user, data)
+
+    def push(self, user: int, data: bytes):
+        """Queues a frame from any thread."""
+        self.loop.call_soon_threadsafe(self._enqueue, (user, data))
+
+    def _enqueue(self, item: Tuple[int, bytes]):
+        self.buffered_bytes += len(item[1])
+        self.queue.put_nowait(item)
+
+    async def get(self) -> Tuple[int, bytes]:
+        """Gets the next ``(user, pcm)`` frame, keeping the byte count."""
+        item = await self.queue.get()
+        self.buffered_bytes -= len(item[1])
+        return item
 
     def format_audio(
         self, audio: discord.sinks.core.AudioData
@@ -51,12 +78,234 @@ class _FrameReceiver(discord.sinks.Sink):
         pass
 
 
+class _Opus16kDecoder:
+    """Per-speaker libopus decoder producing 16 kHz mono s16le.
+
+    Opus can render any packet at any supported rate, so decoding straight
+    to the rate Gemini consumes skips py-cord's 48 kHz stereo output and the
+    downmix and resample that would follow it.
+    """
+
+    SAMPLE_RATE = 16000
+    CHANNELS = 1
+    # Opus packets carry at most 120 ms of audio.
+    MAX_FRAME_SIZE = SAMPLE_RATE * 120 // 1000
+
+    def __init__(self):
+        from discord import opus
+
+        if not opus.is_loaded() and not opus._load_default():
+            raise opus.OpusNotLoaded()
+        self._lib = opus._lib
+        error = ctypes.c_int()
+        self._state = self._lib.opus_decoder_create(
+            self.SAMPLE_RATE, self.CHANNELS, ctypes.byref(error)
+        )
+        self._pcm = (ctypes.c_int16 * (self.MAX_FRAME_SIZE * self.CHANNELS))()
+        self._pcm_ptr = ctypes.cast(self._pcm, ctypes.POINTER(ctypes.c_int16))
+
+    def decode(self, packet: bytes) -> bytes:
+        """Decodes one Opus packet."""
+        samples = self._lib.opus_decode(
+            self._state,
+            packet,
+            len(packet),
+            self._pcm_ptr,
+            self.MAX_FRAME_SIZE,
+            0,
+        )
+        return ctypes.string_at(self._pcm, samples * self.CHANNELS * 2)
+
+    def __del__(self):
+        state = getattr(self, "_state", None)
+        if state is not None:
+            self._lib.opus_decoder_destroy(state)
+            self._state = None
+
+
+class _Opus16kDecodeManager:
+    """Drop-in replacement for py-cord's ``DecodeManager``.
+
+    py-cord's receive thread hands every decrypted packet to
+    ``VoiceClient.decoder.decode``.  This manager decodes those packets with
+    one :class:`_Opus16kDecoder` per SSRC, either inline or on its own
+    worker thread, and pushes the result straight to the receiver.
+    """
+
+    def __init__(
+        self,
+        vc: discord.VoiceClient,
+        receiver: _FrameReceiver,
+        threaded: bool = True,
+    ):
+        self._vc = vc
+        self._receiver = receiver
+        self._decoders: Dict[int, _Opus16kDecoder] = {}
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._thread: Optional[threading.Thread] = None
+        if threaded:
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(
+                target=self._run, name="partybot-opus-decode", daemon=True
+            )
+
+    @property
+    def decoding(self) -> bool:
+        """Whether packets are still waiting to be decoded."""
+        return self._queue is not None and not self._queue.empty()
+
+    def start(self):
+        if self._thread is not None:
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=1)
+        self._decoders.clear()
+
+    def decode(self, data):
+        """Accepts a py-cord ``RawData`` packet from the receive thread."""
+        if data.decrypted_data is None:
+            return
+        if self._queue is not None:
+            self._queue.put(data)
+        else:
+            self._decode(data)
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                return
+            self._decode(data)
+
+    def _decode(self, data):
+        ssrc_info = self._vc.ws.ssrc_map.get(data.ssrc)
+        if ssrc_info is None:
+            # Speaker not identified yet; py-cord would block here instead.
+            return
+        decoder = self._decoders.get(data.ssrc)
+        if decoder is None:
+            decoder = self._decoders[data.ssrc] = _Opus16kDecoder()
+        try:
+            pcm = decoder.decode(data.decrypted_data)
+        except discord.opus.OpusError:
+            return
+        self._receiver.push(ssrc_info["user_id"], pcm)
+
+
+class _OpusLookaheadSource(discord.AudioSource):
+    """AudioSource that hands out Opus packets encoded ahead of time.
+
+    The player thread only pops ready packets, so encoding cost and jitter
+    stay off both the player thread and the event loop.  Returning ``b""``
+    when the lookahead runs dry ends playback; the bridge restarts it once
+    more packets are pushed, or from the player's ``after`` callback if
+    they arrived while it was stopping.
+    """
+
+    FRAME_MS = 20
+
+    def __init__(self, max_packets: int = 25):
+        self._packets: Deque[bytes] = deque()
+        self._max_packets = max_packets
+
+    def __len__(self) -> int:
+        return len(self._packets)
+
+    @property
+    def buffered_bytes(self) -> int:
+        """The size of all encoded packets waiting to be played."""
+        return sum(len(packet) for packet in list(self._packets))
+
+    def push(self, packets: List[bytes]) -> int:
+        """Appends as many packets as fit and returns how many were taken."""
+        count = max(0, min(len(packets), self._max_packets - len(self)))
+        self._packets.extend(packets[:count])
+        return count
+
+    def clear(self):
+        self._packets.clear()
+
+    def read(self) -> bytes:
+        # Called from py-cord's player thread; deque.popleft is atomic.
+        try:
+            return self._packets.popleft()
+        except IndexError:
+            return b""
+
+    def is_opus(self) -> bool:
+        return True
+
+    def cleanup(self):
+        # The player calls this whenever it stops; buffered packets must
+        # survive so playback can resume with the same source.
+        pass
+
+
+class _PacketEncoder:
+    """Splits 48 kHz stereo s16le into 20 ms frames and Opus-encodes them.
+
+    Partial frames are carried over to the next call until :meth:`flush`
+    pads them out.  Not thread-safe; the bridge drives it from a single
+    worker thread.
+    """
+
+    FRAME_SIZE = 960  # samples per channel in 20 ms at 48 kHz
+    FRAME_BYTES = FRAME_SIZE * 2 * 2
+
+    def __init__(self):
+        self._encoder = discord.opus.Encoder()
+        self._carry = b""
+
+    @property
+    def pending_bytes(self) -> int:
+        return len(self._carry)
+
+    def encode(self, pcm: bytes) -> List[bytes]:
+        data = self._carry + pcm
+        end = len(data) - len(data) % self.FRAME_BYTES
+        self._carry = data[end:]
+        return [
+            self._encoder.encode(data[i:i + self.FRAME_BYTES], self.FRAME_SIZE)
+            for i in range(0, end, self.FRAME_BYTES)
+        ]
+
+    def flush(self) -> List[bytes]:
+        """Zero-pads and encodes the carried partial frame, if any."""
+        if not self._carry:
+            return []
+        data = self._carry.ljust(self.FRAME_BYTES, b"\x00")
+        self._carry = b""
+        return [self._encoder.encode(data, self.FRAME_SIZE)]
+
+
 class DiscordBridge:
-    """Bridge Discord's voice client with the bot's audio pipeline."""
+    """Bridge Discord's voice client with the bot's audio pipeline.
 
-    def __init__(self, vc: discord.VoiceClient):
+    By default frames arrive as py-cord decodes them, 48 kHz stereo.  With
+    ``decode_16k`` the received Opus packets are decoded directly to 16 kHz
+    mono instead; check :attr:`sample_rate` and :attr:`channels`.
+    """
+
+    sample_rate = 48000
+    channels = 2
+
+    def __init__(
+        self,
+        vc: discord.VoiceClient,
+        decode_16k: bool = False,
+        threaded_decode: bool = True,
+    ):
         self._vc = vc
-        self._receiver = _FrameReceiver(vc.loop)
+        self._receiver = _FrameReceiver(vc.loop, passthrough=not decode_16k)
+        self._source = _OpusLookaheadSource()
+        self._encoder: Optional[_PacketEncoder] = None
+        self._encode_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="partybot-opus-encode"
+        )
+        self._closed = False
         if hasattr(self._vc, "start_recording"):
             # py-cord >=2.6 exposes start_recording for voice receiving
             self._vc.start_recording(self._receiver, self._on_record_finish)
@@ -64,40 +313,146 @@ class DiscordBridge:
             raise RuntimeError(
                 "PartyBot requires a VoiceClient with voice receiving support."
             )
+        if decode_16k:
+            self.sample_rate = _Opus16kDecoder.SAMPLE_RATE
+            self.channels = _Opus16kDecoder.CHANNELS
+            self._install_decoder(threaded_decode)
+
+    def _install_decoder(self, threaded: bool):
+        """Swaps py-cord's 48 kHz decode manager for the 16 kHz one."""
+        original = getattr(self._vc, "decoder", None)
+        if original is not None:
+            original.stop()
+        self._vc.decoder = _Opus16kDecodeManager(
+            self._vc, self._receiver, threaded
+        )
+        self._vc.decoder.start()
 
     async def recv_frames(self) -> AsyncIterator[Tuple[int, np.ndarray]]:
-        """Receives audio frames from Discord."""
+        """Receives audio frames from Discord.
+
+        Each frame is borrowed from the buffer pool; release it once it has
+        been consumed.
+        """
         while self._vc.is_connected():
-            user_id, pcm_data = await self._receiver.queue.get()
+            user_id, pcm_data = await self._receiver.get()
             yield user_id, self._to_float(pcm_data)
 
     async def play_pcm(self, pcm_data: np.ndarray):
-        """Plays PCM data to Discord."""
-        if self._vc.is_playing():
-            # This is a simple approach. A more robust solution would
-            # be to queue the audio.
-            return
+        """Queues 48 kHz PCM data for playback to Discord.
 
+        The whole chunk is Opus-encoded in one batch on a worker thread and
+        added to the lookahead.  When the lookahead is full this waits for
+        the player to drain it, applying backpressure to the caller.
+        """
         pcm_bytes = self._to_s16le(pcm_data)
-        self._vc.play(discord.PCMAudio(io.BytesIO(pcm_bytes)))
+        loop = asyncio.get_running_loop()
+        packets = await loop.run_in_executor(
+            self._encode_pool, self._encode, pcm_bytes
+        )
+        while True:
+            packets = packets[self._source.push(packets):]
+            self._ensure_playing()
+            if not packets or not self._vc.is_connected():
+                return
+            await asyncio.sleep(_OpusLookaheadSource.FRAME_MS / 1000.0)
+
+    @property
+    def buffered_ms(self) -> int:
+        """Audio already encoded and waiting for the player, in ms."""
+        return len(self._source) * _OpusLookaheadSource.FRAME_MS
+
+    def buffered_bytes(self) -> Dict[str, int]:
+        """Returns the bytes held in the receive queue and playback buffer."""
+        playback = self._source.buffered_bytes
+        if self._encoder is not None:
+            playback += self._encoder.pending_bytes
+        return {
+            "receiver": self._receiver.buffered_bytes,
+            "playback": playback,
+        }
+
+    def close(self):
+        """Drops buffered playback and stops the encoder worker."""
+        self._closed = True
+        self._source.clear()
+        self._encode_pool.shutdown(wait=False)
+
+    def _encode(self, pcm_bytes: bytes) -> List[bytes]:
+        # Runs on the encode worker thread.
+        if self._encoder is None:
+            self._encoder = _PacketEncoder()
+        return self._encoder.encode(pcm_bytes)
+
+    def _flush_encoder(self) -> List[bytes]:
+        # Runs on the encode worker thread.
+        if self._encoder is None:
+            return []
+        return self._encoder.flush()
+
+    def _ensure_playing(self):
+        if len(self._source) and not self._vc.is_playing():
+            self._vc.play(self._source, after=self._after_play)
+
+    def _after_play(self, error: Optional[Exception]):
+        # Called from the player thread once it has stopped.
+        if not self._closed:
+            asyncio.run_coroutine_threadsafe(
+                self._on_player_stopped(), self._vc.loop
+            )
+
+    async def _on_player_stopped(self):
+        """Restarts the player if it ran dry while audio was still due.
+
+        Packets pushed while the player was stopping are played now instead
+        of waiting for the next chunk.  Once the lookahead is empty the
+        carried partial frame, the tail of the utterance, is padded and
+        played too.
+        """
+        if self._closed:
+            return
+        if not len(self._source):
+            loop = asyncio.get_running_loop()
+            packets = await loop.run_in_executor(
+                self._encode_pool, self._flush_encoder
+            )
+            self._source.push(packets)
+        if self._vc.is_connected():
+            self._ensure_playing()
 
     async def _on_record_finish(self, sink: _FrameReceiver):
         """Callback for when recording stops."""
         pass
 
     def _to_float(self, pcm_data: bytes) -> np.ndarray:
-        """Converts s16le PCM data to float32 while preserving channels."""
-        array = (
-            np.frombuffer(pcm_data, dtype=np.int16).astype(np.float32) / 32768.0
-        )
+        """Converts s16le PCM data to pooled float32, preserving channels."""
+        samples = np.frombuffer(pcm_data, dtype=np.int16)
         # Discord/py-cord sends stereo frames by default. Reshape accordingly
         # so that downstream components receive the original channel layout.
-        return array.reshape(-1, 2)
+        out = POOL.acquire((len(samples) // self.channels, self.channels))
+        # Casting first and scaling in place avoids numpy's float64 buffers.
+        np.copyto(out, samples.reshape(out.shape))
+        out *= 1 / 32768.0
+        return out
 
     def _to_s16le(self, pcm_data: np.ndarray) -> bytes:
         """Converts float32 PCM data to stereo s16le."""
-        if pcm_data.ndim == 1:
-            pcm_data = pcm_data.reshape(-1, 1)
-        if pcm_data.shape[1] == 1:
-            pcm_data = np.repeat(pcm_data, 2, axis=1)
-        return (pcm_data * 32768.0).astype(np.int16).tobytes()
+        pcm_data = pcm_data.reshape(len(pcm_data), -1)
+        scaled = POOL.acquire((len(pcm_data), 2))
+        if pcm_data.shape[1] == 2:
+            np.multiply(pcm_data, 32768.0, out=scaled)
+        else:
+            # Mono is duplicated per column; broadcasting would make numpy
+            # allocate an intermediate buffer.
+            np.multiply(pcm_data[:, 0], 32768.0, out=scaled[:, 0])
+            scaled[:, 1] = scaled[:, 0]
+        # Full-scale positive samples would otherwise wrap to -32768.
+        np.minimum(scaled, 32767, out=scaled)
+        np.maximum(scaled, -32768, out=scaled)
+        samples = POOL.acquire(scaled.shape, np.int16)
+        np.copyto(samples, scaled, casting="unsafe")
+        # The Opus encoder needs an immutable bytes object.
+        data = samples.tobytes()
+        POOL.release(scaled)
+        POOL.release(samples)
+        return data